@@ -1,19 +1,44 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g
+from werkzeug.serving import make_server
 from balancer.Problem import Problem
-from balancer.Node import SHIP_ROWS, SHIP_COLS
+from balancer.Manifest import format_outbound_manifest, outbound_filename, parse_manifest, ManifestError
+from balancer.Jobs import JobManager
+from balancer.Cache import SolutionCache
+from balancer.Payload import solution_payload, encode_payload
+from balancer.Geometry import parse_geometry
+from balancer.Repair import manifests_match
+from balancer.Sessions import OperatorSessions
+import hashlib
 import os
 import time
 import sys
 import signal
+import threading
 from datetime import datetime
 
+try:
+    from waitress import serve as waitress_serve
+except ImportError: #optional, Werkzeug's threaded server is used without it
+    waitress_serve = None
+
 app = Flask(__name__)
 MANIFEST_DIR = "manifests"
+JOBS = JobManager(max_workers=2) #background solves, see /jobs
+SOLUTION_CACHE = SolutionCache(directory=os.environ.get("BALANCER_CACHE_DIR", "solution_cache") or None) #empty env var keeps it in memory only
+SOLUTION_PAYLOADS = SolutionCache(capacity=128) #encoded grid/plan JSON by ETag, served by /solutions
+PAGE_SHELL = {} #the rendered GET page and its ETag, see page_shell()
+CHECKPOINT_DIR = os.environ.get("BALANCER_CHECKPOINT_DIR", "checkpoints") #interrupted A* searches, resumed by the next solve
+ACTIVE_SOLVERS = set() #solves running on request threads, cancelled at shutdown so they can checkpoint
+ACTIVE_SOLVERS_LOCK = threading.Lock()
+SHUTDOWN_WAIT = 10.0 #seconds to let interrupted solves write their checkpoints
+SHIP_GEOMETRY = parse_geometry(os.environ.get("BALANCER_BAY", "")) #bay size when the form leaves it blank, e.g. "10x16"
+OPERATOR_COOKIE = "balancer_operator"
+OPERATOR_COOKIE_AGE = 30 * 24 * 3600
+SERVER_HOST = os.environ.get("BALANCER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("BALANCER_PORT", "5000"))
+SERVER_THREADS = int(os.environ.get("BALANCER_THREADS", "16")) #request threads when served by waitress
 
 SESSION_START_TIME = datetime.now()
-FULL_LOG = []
-
-CURRENT_LOG_STRING = "" 
 
 def get_desktop_path(): 
     onedrive_desktop = os.path.join(os.path.expanduser("~"), "OneDrive", "Desktop")
@@ -22,75 +47,152 @@ def get_desktop_path():
     
     return os.path.join(os.path.expanduser("~"), "Desktop")
 
-def write_to_log(message):
-    global CURRENT_LOG_STRING
+def operator_log_path(operator_id):
+    #one log file per operator and shift, told apart by the start of the operator id
+    return os.path.join(get_desktop_path(), f"FormosaSolutionsPort{SESSION_START_TIME.strftime('%m_%d_%Y_%H%M')}_{operator_id[:8]}.txt")
+
+#per-browser state (log, recent plans, job ownership), see balancer/Sessions.py. Each log is written to the
+#desktop as the shift goes, not only at shutdown; see balancer/SessionLog.py
+OPERATORS = OperatorSessions(log_path=operator_log_path)
+LOG_START_LOCK = threading.Lock()
+
+def write_to_log(operator, message):
     timestamp = datetime.now().strftime("%m/%d/%Y: %H:%M")
     entry = f"{timestamp} {message}"
-    
-    FULL_LOG.append(entry)
-    
-    if CURRENT_LOG_STRING:
-        CURRENT_LOG_STRING += "\n" + entry
-    else:
-        CURRENT_LOG_STRING = entry
-        
-    return entry
+    return operator.log.write(entry)
 
-def save_session_log_to_desktop():
-    write_to_log("Program was shut down.")
-    
-    filename = f"FormosaSolutionsPort{SESSION_START_TIME.strftime('%m_%d_%Y_%H%M')}.txt"
-    filepath = os.path.join(get_desktop_path(), filename)
-    
+def log_program_start(operator):
+    #an operator's first request opens their log; several arriving at once must not each write it
+    with LOG_START_LOCK:
+        if not operator.log:
+            write_to_log(operator, "Program was started.")
+
+def log_since(operator, cursor):
+    #log entries the page hasn't shown yet; reset means the page is too far behind and should replace its log
+    entries, next_cursor, reset = operator.log.entries_since(cursor)
+    return {"log_entries": entries, "log_cursor": next_cursor, "log_reset": reset}
+
+def read_log_cursor(value):
     try:
-        with open(filepath, "w") as f:
-            f.write(CURRENT_LOG_STRING)
-        print(f"\n[SYSTEM] Log file saved to Desktop: {filepath}")
-    except Exception as e:
-        print(f"\n[ERROR] Could not save log to desktop: {e}")
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+def save_session_logs_to_desktop():
+    for operator in OPERATORS.all():
+        if not operator.log: #never opened the page
+            continue
+        write_to_log(operator, "Program was shut down.")
+
+        if operator.log.flush():
+            print(f"\n[SYSTEM] Log file saved to Desktop: {operator.log.filepath}")
+        else:
+            print(f"\n[ERROR] Could not save log to desktop: {operator.log.flush_error}")
+
+def stop_solves():
+    #cancel every running search; the A* strategies save a checkpoint as they stop
+    with ACTIVE_SOLVERS_LOCK:
+        solvers = list(ACTIVE_SOLVERS)
+    for solver in solvers:
+        solver.cancel()
+    JOBS.shutdown(SHUTDOWN_WAIT)
+
+    deadline = time.time() + SHUTDOWN_WAIT
+    while ACTIVE_SOLVERS and time.time() < deadline:
+        time.sleep(0.1)
+
+def run_solver(solver):
+    #solve on the request thread, where stop_solves() can still reach it
+    with ACTIVE_SOLVERS_LOCK:
+        ACTIVE_SOLVERS.add(solver)
+    try:
+        solver.solve()
+    finally:
+        with ACTIVE_SOLVERS_LOCK:
+            ACTIVE_SOLVERS.discard(solver)
 
 def signal_handler(sig, frame):
     print("\n[SYSTEM] Closing program...")
-    save_session_log_to_desktop()
+    stop_solves()
+    save_session_logs_to_desktop()
     sys.exit(0)
 
 signal.signal(signal.SIGINT, signal_handler)
 
+@app.before_request
+def load_operator():
+    #every browser gets a random operator id in a cookie, so its recent plans and jobs are its own
+    g.operator, g.new_operator = OPERATORS.get(request.cookies.get(OPERATOR_COOKIE))
+
+@app.after_request
+def remember_operator(response):
+    if g.get("new_operator"):
+        response.set_cookie(OPERATOR_COOKIE, g.operator.id, max_age=OPERATOR_COOKIE_AGE, httponly=True, samesite="Lax")
+    return response
+
 @app.route("/add_comment", methods=["POST"])
 def add_comment():
-    global CURRENT_LOG_STRING
     try:
         data = request.json
         comment = data.get("content", "").strip()
         
         if comment:
             # Specify "[COMMENT]" for easier readability
-            write_to_log(f"[COMMENT] {comment}")
+            write_to_log(g.operator, f"[COMMENT] {comment}")
             
-        return jsonify({"log": CURRENT_LOG_STRING}), 200
+        return jsonify(log_since(g.operator, read_log_cursor(data.get("since")))), 200
     except Exception as e:
         print(f"Error adding comment: {e}")
         return jsonify({"error": str(e)}), 500
 
 def write_outbound_manifest(ship_state, original_filename):
-    base_name = original_filename.replace(".txt", "")
-    out_name = f"{base_name}OUTBOUND.txt"
+    out_name = outbound_filename(original_filename)
     filepath = os.path.join(get_desktop_path(), out_name)
     try:
         with open(filepath, "w") as f:
-            for r in range(SHIP_ROWS):
-                for c in range(SHIP_COLS):
-                    slot = ship_state[r][c]
-                    line = f"[{r+1:02},{c+1:02}], {{{slot.weight:05}}}, {slot.description}\n"
-                    f.write(line)
+            f.write(format_outbound_manifest(ship_state))
         return out_name
     except Exception as e:
         print(f"Error writing outbound: {e}")
         return None
 
+STRATEGY_LABELS = [
+    ("astar", "A* (optimal)"),
+    ("weighted", "Weighted A* (fast, plans may cost more)"),
+    ("ida", "IDA* (optimal, low memory)"),
+    ("beam", "Beam search (anytime)"),
+    ("portfolio", "Portfolio (all cores, best plan within the time budget)"),
+]
+#the optimal strategies search with the admissible partition bound (see balancer/Heuristic.py); the rest keep the faster
+#greedy default, which can cost a few minutes more per plan
+STRATEGY_HEURISTICS = {"astar": "partition", "ida": "partition"}
+PORTFOLIO_TIME_LIMIT = 20.0 #seconds the operator waits for a portfolio plan when no time budget is given
+
+def read_search_options(form):
+    #strategy (with its heuristic) and optional budgets picked on the operator page, blank budgets mean unlimited
+    strategy = form.get("strategy", "astar")
+    if strategy not in Problem.STRATEGIES:
+        strategy = "astar"
+
+    time_limit = form.get("time_limit", "").strip()
+    max_nodes = form.get("max_nodes", "").strip()
+    if not time_limit and strategy == "portfolio":
+        time_limit = PORTFOLIO_TIME_LIMIT #the portfolio answers within a fixed budget
+    return {
+        "strategy": strategy,
+        "heuristic": STRATEGY_HEURISTICS.get(strategy),
+        "time_limit": float(time_limit) if time_limit else None,
+        "max_nodes": int(max_nodes) if max_nodes else None,
+    }
+
+def read_geometry(form):
+    #bay size typed on the operator page, raises ValueError for anything that isn't ROWSxCOLS
+    bay = form.get("bay", "").strip()
+    return parse_geometry(bay) if bay else SHIP_GEOMETRY
+
 class CapturingProblem(Problem):
-    def __init__(self, manifest_text):
-        super().__init__(manifest_text)
+    def __init__(self, manifest_text, **search_options):
+        super().__init__(manifest_text, **search_options)
         self.steps = [] 
         self.total_cost = 0
         self.final_node = None
@@ -98,6 +200,7 @@ class CapturingProblem(Problem):
 
     def solution_log(self, goalNode, total_time=0):
         self.final_time_minutes = total_time
+        self.steps = []
         solution_nodes = []
         current_node = goalNode
         while current_node:
@@ -110,120 +213,257 @@ class CapturingProblem(Problem):
         self.total_cost = goalNode.g_cost
         self.final_node = goalNode 
 
-def grid_to_json(ship_state):
-    grid_data = []
-    for r in range(SHIP_ROWS):
-        row_data = []
-        for c in range(SHIP_COLS):
-            slot = ship_state[r][c]
-            row_data.append({
-                "weight": slot.weight,
-                "name": slot.description,
-                "r": r,
-                "c": c
-            })
-        grid_data.append(row_data)
-    return grid_data
+def publish_solution(manifest, steps=(), total_time=0, total_cost=0):
+    #store the compact page payload (see balancer/Payload.py) and return its id, which is also its ETag
+    body, etag = encode_payload(solution_payload(manifest.grid, steps, total_time, total_cost, manifest.geometry))
+    SOLUTION_PAYLOADS.put(etag, body)
+    return etag
+
+def publish_result(solver):
+    return publish_solution(solver.manifest, solver.steps, solver.final_time_minutes, solver.total_cost)
+
+def read_manifest_from_request():
+    #uploaded file first, then a filename from manifests/, then the pasted text, for the bay size on the form.
+    #Returns (ParsedManifest or None, text to show in the form, filename, error); files are parsed as they stream in
+    filename_display = ""
+
+    try:
+        geometry = read_geometry(request.form)
+    except ValueError as e:
+        return None, request.form.get("manifest", ""), "", f"Bay Error: {e}"
+
+    try:
+        uploaded = request.files.get("file")
+        if uploaded and uploaded.filename:
+            if not uploaded.filename.lower().endswith(".txt"):
+                return None, "", "", "Only .txt files can be uploaded."
+            manifest = parse_manifest(uploaded.stream, geometry)
+            return manifest, format_outbound_manifest(manifest.grid), uploaded.filename, None
+
+        fname = request.form.get("filename", "").strip()
+        if fname:
+            path = os.path.join(MANIFEST_DIR, fname)
+            if not os.path.isfile(path):
+                return None, "", "", f"Manifest '{fname}' not found."
+            filename_display = fname
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = parse_manifest(f, geometry)
+            return manifest, format_outbound_manifest(manifest.grid), fname, None
+
+        manifest_text = request.form.get("manifest", "")
+        return parse_manifest(manifest_text, geometry), manifest_text, "", None
+
+    except ManifestError as e:
+        return None, request.form.get("manifest", ""), filename_display, f"Manifest Error: {e}"
+
+def open_manifest(manifest, filename_display, search_options, operator):
+    #a corrected manifest under a filename this operator solved before is re-solved from their previous plan (see balancer/Repair.py),
+    #but only when it still holds most of the same containers; another ship under a reused filename is solved from scratch
+    previous = operator.previous_plan(filename_display)
+    warm_start = previous is not None and manifests_match(previous[0].grid, manifest.grid)
+    if warm_start:
+        search_options = dict(search_options, previous_manifest=previous[0], previous_moves=previous[1])
+    solver = CapturingProblem(manifest, cache=SOLUTION_CACHE, **search_options)
+    if CHECKPOINT_DIR:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        solver.checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{solver.cache_key()}.ckpt")
+    solution_id = publish_solution(manifest)
+
+    write_to_log(operator, f"Manifest {filename_display} is opened, there are {manifest.container_count} containers on the ship.")
+    if previous is not None and not warm_start:
+        write_to_log(operator, f"Manifest {filename_display} differs from the one last solved under that name, solving it from scratch.")
+    if not solver.balance_target.achievable:
+        write_to_log(operator, f"Balance within 10% is not achievable, minimizing imbalance to {solver.balance_target.min_imbalance}.")
+
+    return solver, solution_id
+
+def finish_solve(solver, filename_display, operator):
+    #log the plan and write the outbound manifest once the search is over; returns an error message or None
+    steps = solver.steps
+    write_to_log(operator, solver.stats.summary())
+
+    if steps:
+        if solver.cache_hit:
+            write_to_log(operator, "Reused a cached plan for an identical container layout.")
+        elif solver.repaired_plan is not None and solver.final_node is solver.repaired_plan:
+            write_to_log(operator, f"Re-solved from the previous plan for {filename_display}, repaired to {solver.final_time_minutes} minutes.")
+        operator.remember_plan(filename_display, solver.manifest, steps)
+        write_to_log(operator, f"Balance solution found, it will require {len(steps)} moves/{solver.total_cost} minutes.")
+        for step in steps:
+            src, dst = step
+            src_str = f"[{src[0]+1:02},{src[1]+1:02}]"
+            dst_str = f"[{dst[0]+1:02},{dst[1]+1:02}]"
+            write_to_log(operator, f"{src_str} was moved to {dst_str}")
+        
+        out_filename = write_outbound_manifest(solver.final_node.state, filename_display)
+        if out_filename:
+            write_to_log(operator, f"Finished a Cycle. Manifest {out_filename} was written to desktop, and a reminder pop-up to operator to send file was displayed.")
+        else:
+            write_to_log(operator, "Finished a Cycle. Error writing outbound manifest.")
+
+    elif solver.initial_state.is_balanced():
+        write_to_log(operator, "Status: Ship is already balanced.")
+
+    if solver.stop_reason is not None and solver.checkpoint_path and os.path.exists(solver.checkpoint_path):
+        write_to_log(operator, "Search progress was saved; solving this manifest again with the same settings resumes it.")
+
+    if not steps and not solver.initial_state.is_balanced():
+        if solver.stop_reason == "cancelled":
+            return "Solve was cancelled."
+        if solver.stop_reason == "time":
+            return "No solution found within the time budget."
+        if solver.stop_reason == "memory":
+            return "No solution found within the node budget."
+        return "No solution found."
+    return None
+
+def solve_in_background(filename_display, operator):
+    #runs on a job thread, outside the request, so the operator's session is passed in rather than read from g
+    def run(solver):
+        start_time = time.time()
+        solver.solve()
+        time_taken = round((time.time() - start_time) * 1000)
+        error = finish_solve(solver, filename_display, operator)
+        return {
+            "solution": publish_result(solver),
+            "moves": len(solver.steps),
+            "total_time": solver.final_time_minutes,
+            "time": time_taken,
+            "error": error,
+        }
+    return run
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    log_program_start(g.operator)
+
+    try:
+        search_options = read_search_options(request.form)
+    except ValueError:
+        return jsonify({"error": "Time and node budgets must be numbers."}), 400
+
+    manifest, _, filename_display, error = read_manifest_from_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        solver, solution_id = open_manifest(manifest, filename_display, search_options, g.operator)
+    except Exception as e:
+        return jsonify({"error": f"Algorithm Error: {e}"}), 400
+
+    job = JOBS.submit(solver, solve_in_background(filename_display, g.operator), filename_display, owner=g.operator.id)
+    return jsonify({"id": job.id, "solution": solution_id, **log_since(g.operator, read_log_cursor(request.form.get("log_since")))}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = JOBS.get(job_id, owner=g.operator.id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
+
+    data = job.to_json()
+    data.update(log_since(g.operator, read_log_cursor(request.args.get("since"))))
+    return jsonify(data), 200
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = JOBS.cancel(job_id, owner=g.operator.id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(job.to_json()), 200
+
+@app.route("/solutions/<solution_id>", methods=["GET"])
+def solution_data(solution_id):
+    #payloads never change under an id, so a browser revalidating with If-None-Match gets an empty 304
+    body = SOLUTION_PAYLOADS.get(solution_id)
+    if body is None:
+        return jsonify({"error": "Unknown solution."}), 404
+
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(solution_id)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def page_shell():
+    #the GET page has no per-request data (the log and solutions are fetched as JSON), so render it once.
+    #Body and ETag are stored as one tuple so a thread never reads one without the other
+    shell = PAGE_SHELL.get("page")
+    if shell is None:
+        body = render_template("index.html", error=None, manifest="", solution_id=None, moves=0, filename="", time=None, total_time=0,
+                               strategies=STRATEGY_LABELS, strategy="astar", time_limit=None, max_nodes=None, bay="", default_bay=SHIP_GEOMETRY)
+        shell = PAGE_SHELL.setdefault("page", (body, hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]))
+
+    body, etag = shell
+    response = app.response_class(body, mimetype="text/html")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route("/log", methods=["GET"])
+def log_entries():
+    return jsonify(log_since(g.operator, read_log_cursor(request.args.get("since")))), 200
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global CURRENT_LOG_STRING
-    
-    if not FULL_LOG:
-        write_to_log("Program was started.")
+    log_program_start(g.operator)
+
+    if request.method == "GET":
+        return page_shell()
 
     manifest_text = ""
     error = None
-    steps = None
-    grid_json = None
+    moves = 0
+    solution_id = None
     filename_display = ""
     time_taken = None
     
     total_time_display = 0
+    search_options = {"strategy": "astar", "time_limit": None, "max_nodes": None}
 
-    if request.method == "POST":
+    budget_error = False
+    try:
+        search_options = read_search_options(request.form)
+    except ValueError:
+        budget_error = True
 
-        uploaded = request.files.get("file")
-        if uploaded and uploaded.filename:
-            if uploaded.filename.lower().endswith(".txt"):
-                try:
-                    manifest_text = uploaded.read().decode("utf-8")
-                    filename_display = uploaded.filename
-                except:
-                    error = "Error reading uploaded file."
-            else:
-                error = "Only .txt files can be uploaded."
-
-        if not manifest_text:
-            fname = request.form.get("filename", "").strip()
-            if fname:
-                path = os.path.join(MANIFEST_DIR, fname)
-                if os.path.isfile(path):
-                    with open(path, "r", encoding="utf-8") as f:
-                        manifest_text = f.read()
-                    filename_display = fname
-                else:
-                    error = f"Manifest '{fname}' not found."
-
-        if not manifest_text:
-            manifest_text = request.form.get("manifest", "")
-
-        if manifest_text == "":
-            error = "File is blank"
+    manifest, manifest_text, filename_display, error = read_manifest_from_request()
     
+    if budget_error:
+        error = "Time and node budgets must be numbers."
+    elif manifest is not None:
         
-        if manifest_text.strip():
+        try:
+            start_time = time.time()
+            solver, solution_id = open_manifest(manifest, filename_display, search_options, g.operator)
+
+            run_solver(solver)
+            final_time = time.time()
+            time_taken = round((final_time - start_time) * 1000)
+            moves = len(solver.steps)
+
+            error = finish_solve(solver, filename_display, g.operator)
+            total_time_display = solver.final_time_minutes
+            solution_id = publish_result(solver)
             
-            try:
-                container_count = 0
-                start_time = time.time()
-                solver = CapturingProblem(manifest_text)
-                initial_tuple_grid = solver.initial_state.state 
-                grid_json = grid_to_json(initial_tuple_grid)
-
-                for r in range(SHIP_ROWS):
-                    for c in range(SHIP_COLS):
-                        slot = initial_tuple_grid[r][c]
-                        if slot.description not in ("UNUSED", "NAN"):
-                            container_count += 1
-                
-                write_to_log(f"Manifest {filename_display} is opened, there are {container_count} containers on the ship.")
-
-                solver.run_a_star()
-                final_time = time.time()
-                time_taken = round((final_time - start_time) * 1000)
-                steps = solver.steps
-
-                if steps:
-                    write_to_log(f"Balance solution found, it will require {len(steps)} moves/{solver.total_cost} minutes.")
-                    for step in steps:
-                        src, dst = step
-                        src_str = f"[{src[0]+1:02},{src[1]+1:02}]"
-                        dst_str = f"[{dst[0]+1:02},{dst[1]+1:02}]"
-                        write_to_log(f"{src_str} was moved to {dst_str}")
-                    
-                    out_filename = write_outbound_manifest(solver.final_node.state, filename_display)
-                    if out_filename:
-                        write_to_log(f"Finished a Cycle. Manifest {out_filename} was written to desktop, and a reminder pop-up to operator to send file was displayed.")
-                    else:
-                        write_to_log("Finished a Cycle. Error writing outbound manifest.")
-
-                elif solver.initial_state.is_balanced():
-                    write_to_log("Status: Ship is already balanced.")
-
-                total_time_display = solver.final_time_minutes
-                
-                if not steps and not solver.initial_state.is_balanced():
-                    error = "No solution found."
-                
-            except Exception as e:
-                error = f"Algorithm Error: {e}"
-                print(f"Error: {e}")
-
-    return render_template("index.html", error=error, manifest=manifest_text, grid=grid_json, steps=steps, filename=filename_display, time=time_taken, total_time=total_time_display, log_content=CURRENT_LOG_STRING)
+        except Exception as e:
+            error = f"Algorithm Error: {e}"
+            print(f"Error: {e}")
+
+    return render_template("index.html", error=error, manifest=manifest_text, solution_id=solution_id, moves=moves, filename=filename_display, time=time_taken, total_time=total_time_display, strategies=STRATEGY_LABELS,
+                           bay=request.form.get("bay", "").strip(), default_bay=SHIP_GEOMETRY, **search_options)
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS):
+    #one process answering on many threads. Jobs, caches, operator sessions and the log live in this process's
+    #memory, so it must not be forked into several workers; a slow solve on one request thread no longer holds
+    #up the others, and the portfolio strategy already spreads its searches over processes
+    if waitress_serve is not None:
+        print(f"[SYSTEM] Serving on http://{host}:{port} with {threads} threads (waitress)")
+        waitress_serve(app, host=host, port=port, threads=threads)
+        return
+
+    server = make_server(host, port, app, threaded=True) #a thread per request
+    print(f"[SYSTEM] Serving on http://{host}:{server.server_port} (threaded)")
+    server.serve_forever()
 
 if __name__ == "__main__":
     os.makedirs(MANIFEST_DIR, exist_ok=True)
-    if not FULL_LOG:
-        write_to_log("Program was started.")
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+    serve()
\ No newline at end of file
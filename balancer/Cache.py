@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .Node import NAN_CELL, UNUSED_CELL
+
+KEY_VERSION = 2 #bump whenever move costs change, so plans priced the old way are searched again
+
+def manifest_key(ship, config=""):
+    #content address of a manifest: weights by position (NAN and UNUSED marked), never descriptions,
+    #so re-uploads that only rename containers hit the same entry. config separates solver settings
+    weights = ship.table.weights
+    geometry = ship.table.geometry
+    cells = []
+    for r in range(geometry.rows):
+        for c in range(geometry.cols):
+            code = ship.cell(r, c)
+            if code == NAN_CELL:
+                cells.append("X")
+            elif code == UNUSED_CELL:
+                cells.append(".")
+            else:
+                cells.append(str(weights[code]))
+
+    canonical = f"v{KEY_VERSION}|{geometry}|{','.join(cells)}|{config}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class SolutionCache:
+    # SOLUTION CACHE CLASS
+    # -------------
+    # Content-addressed store of solved plans: an in-memory LRU, optionally backed by one JSON file per entry.
+    # Functionality:
+    #   Entries hold the move list and its cost/timing. Moves are positions, so Problem replays them on the new
+    #   manifest and the outbound grid picks up the new descriptions
+    #   The disk layer survives restarts; memory hits never touch it
+    #   Safe to share between request threads and background jobs
+
+    capacity: int
+    directory: Optional[str]
+
+    def __init__(self, capacity=256, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self.load(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.remember(key, entry)
+        self.store(key, entry)
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def load(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        #JSON turns the move tuples into lists
+        entry["moves"] = [tuple(tuple(cell) for cell in move) for move in entry["moves"]]
+        return entry
+
+    def store(self, key, entry):
+        if not self.directory:
+            return
+        filepath = self.path_for(key)
+        temp_path = f"{filepath}.tmp{threading.get_ident()}"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, filepath) #never leave a half-written entry behind
+        except OSError as e:
+            print(f"Error writing solution cache entry: {e}")
@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import threading
+import zlib
+from array import array
+from typing import List, Optional
+
+from .Node import Node
+
+MAGIC = b"BALCKPT"
+CHECKPOINT_VERSION = 2
+
+#typecode of every array in a checkpoint, in file order
+ARRAYS = (
+    ("table_keys", "Q"),   #TranspositionTable keys
+    ("table_entries", "q"), #their packed g_cost * 2 + closed flag
+    ("node_parents", "i"), #search tree, parents before children; index 0 is the initial state (-1)
+    ("node_moves", "I"),   #(from_r, from_c, to_r, to_c) packed 8 bits each
+    ("node_keys", "Q"),
+    ("node_g", "q"),
+    ("node_h", "q"),
+    ("open_priority", "d"), #open list entries: priority, tie-break order, node index
+    ("open_order", "q"),
+    ("open_nodes", "i"),
+)
+
+class SearchCheckpoint:
+    # SEARCH CHECKPOINT CLASS
+    # -------------
+    # An A* search frozen mid-run: open list, transposition table, best plan seen so far and counters,
+    # so a later solve of the same manifest and settings can carry on, in this process or another one.
+    # Functionality:
+    #   save() walks the open entries (and the incumbent) up to the initial state, keeping only that part
+    #   of the search tree: closed nodes nobody still points to are dropped
+    #   Nodes are stored without ships, as their move, costs and key; a resumed search rebuilds a ship when
+    #   it pops the node (Node.ship_state() replays it from the initial state)
+    #   save()/load() use a zlib-compressed file: a JSON header and flat typed arrays, no pickle, written
+    #   atomically. load() returns None for a missing, damaged or foreign checkpoint (different key or version)
+
+    key: str
+    open_list: list
+    incumbent: Optional[Node]
+
+    def __init__(self, key, open_list, table, node_idx, incumbent=None, counters=None):
+        self.key = key
+        self.open_list = open_list
+        self.table = table
+        self.node_idx = node_idx
+        self.incumbent = incumbent
+        self.counters = counters or {}
+
+    def save(self, path):
+        arrays = {name: array(typecode) for name, typecode in ARRAYS}
+        arrays["table_keys"].extend(self.table.entries.keys())
+        arrays["table_entries"].extend(self.table.entries.values())
+
+        nodes = self.tree_nodes()
+        index = {id(node): i for i, node in enumerate(nodes)}
+        for node in nodes:
+            if node.parent is None:
+                arrays["node_parents"].append(-1)
+                arrays["node_moves"].append(0)
+            else:
+                (r1, c1), (r2, c2) = node.prev_state
+                arrays["node_parents"].append(index[id(node.parent)])
+                arrays["node_moves"].append(r1 << 24 | c1 << 16 | r2 << 8 | c2)
+            arrays["node_keys"].append(node.key)
+            arrays["node_g"].append(node.g_cost)
+            arrays["node_h"].append(node.h_cost)
+
+        for priority, order, node in self.open_list:
+            arrays["open_priority"].append(priority)
+            arrays["open_order"].append(order)
+            arrays["open_nodes"].append(index[id(node)])
+
+        header = {
+            "version": CHECKPOINT_VERSION,
+            "key": self.key,
+            "byteorder": sys.byteorder,
+            "node_idx": self.node_idx,
+            "reopened": self.table.reopened,
+            "incumbent": -1 if self.incumbent is None else index[id(self.incumbent)],
+            "counters": self.counters,
+            "lengths": {name: len(values) for name, values in arrays.items()},
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        payload = len(header_bytes).to_bytes(4, "big") + header_bytes + b"".join(arrays[name].tobytes() for name, _ in ARRAYS)
+
+        temp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC + zlib.compress(payload, 1))
+        os.replace(temp_path, path) #a crash mid-write keeps the previous checkpoint
+
+    def tree_nodes(self):
+        #every node on a path from the initial state to an open node or the incumbent, parents first
+        nodes: List[Node] = []
+        seen = set()
+        ends = [node for _, _, node in self.open_list]
+        if self.incumbent is not None:
+            ends.append(self.incumbent)
+
+        for node in ends:
+            path = []
+            while node is not None and id(node) not in seen:
+                seen.add(id(node))
+                path.append(node)
+                node = node.parent
+            path.reverse()
+            nodes.extend(path)
+        return nodes
+
+    @classmethod
+    def load(cls, path, key, root, table):
+        #the checkpoint at path rebuilt on root (the initial state of the resumed Problem) and into table
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                return None
+            payload = zlib.decompress(data[len(MAGIC):])
+            header_length = int.from_bytes(payload[:4], "big")
+            header = json.loads(payload[4:4 + header_length])
+        except (OSError, ValueError, zlib.error):
+            return None
+        if header.get("version") != CHECKPOINT_VERSION or header.get("key") != key:
+            return None
+
+        try:
+            arrays = cls.read_arrays(payload, 4 + header_length, header)
+        except (KeyError, ValueError):
+            return None
+
+        table.entries = dict(zip(arrays["table_keys"], arrays["table_entries"]))
+        table.reopened = header["reopened"]
+
+        positions = root.ship.table.geometry.positions
+        nodes: List[Node] = []
+        for parent, move, node_key, g_cost, h_cost in zip(
+            arrays["node_parents"], arrays["node_moves"], arrays["node_keys"], arrays["node_g"], arrays["node_h"]
+        ):
+            if parent < 0:
+                nodes.append(root)
+                continue
+            prev_state = (positions[move >> 24][move >> 16 & 255], positions[move >> 8 & 255][move & 255])
+            nodes.append(Node.restore(nodes[parent], prev_state, node_key, g_cost, h_cost))
+
+        open_list = [
+            (priority, order, nodes[node])
+            for priority, order, node in zip(arrays["open_priority"], arrays["open_order"], arrays["open_nodes"])
+        ]
+        incumbent = nodes[header["incumbent"]] if header["incumbent"] >= 0 else None
+        return cls(key, open_list, table, header["node_idx"], incumbent, header["counters"])
+
+    @staticmethod
+    def read_arrays(payload, offset, header):
+        arrays = {}
+        for name, typecode in ARRAYS:
+            values = array(typecode)
+            size = header["lengths"][name] * values.itemsize
+            if offset + size > len(payload):
+                raise ValueError("Checkpoint is truncated")
+            values.frombytes(payload[offset:offset + size])
+            if header["byteorder"] != sys.byteorder:
+                values.byteswap()
+            arrays[name] = values
+            offset += size
+        return arrays
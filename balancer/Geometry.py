@@ -0,0 +1,74 @@
+import re
+
+MAX_SIDE = 99 #manifest lines number rows and columns with two digits
+
+class Geometry:
+    # GEOMETRY CLASS
+    # -------------
+    # Shape of one ship's bay: rows x cols of slots, where the crane parks, and where the keel splits port from starboard.
+    # Functionality:
+    #   One per manifest (parse_manifest takes it, ParsedManifest keeps it) and shared by every ShipState built
+    #   from it through its ContainerTable, so Node, the heuristics and app.py never assume the 8x12 default
+    #   park is the crane's (row, col) when idle, on row `rows`: the lane above the bay. Defaults to its column 0
+    #   Columns left of keel are portside; it defaults to the middle column (cols // 2)
+    #   positions holds one shared (row, col) tuple per position, park row included, so moves and crane
+    #   positions of the millions of nodes a search builds don't each allocate their own
+    #   Geometries with the same fields are equal; str() is "ROWSxCOLS", plus park and keel when not the defaults
+
+    __slots__ = ("rows", "cols", "park", "keel", "positions")
+
+    rows: int
+    cols: int
+
+    def __init__(self, rows=8, cols=12, park=None, keel=None):
+        if not 1 <= rows <= MAX_SIDE or not 2 <= cols <= MAX_SIDE:
+            raise ValueError(f"A bay needs 1-{MAX_SIDE} rows and 2-{MAX_SIDE} columns, got {rows}x{cols}")
+        park = (rows, 0) if park is None else tuple(park)
+        if park[0] != rows or not 0 <= park[1] < cols:
+            raise ValueError(f"The crane parks above the bay, on row {rows + 1} and one of its {cols} columns, got {park}")
+        keel = cols // 2 if keel is None else keel
+        if not 1 <= keel < cols:
+            raise ValueError(f"The keel must leave at least one column on each side, got {keel} of {cols}")
+
+        self.rows = rows
+        self.cols = cols
+        self.park = park
+        self.keel = keel
+        self.positions = tuple(tuple((r, c) for c in range(cols)) for r in range(rows + 1))
+
+    def keel_distance(self, c):
+        #columns to the nearest column across the keel
+        return self.keel - c if c < self.keel else c - self.keel + 1
+
+    def fields(self):
+        return (self.rows, self.cols, self.park, self.keel)
+
+    def __eq__(self, other):
+        return isinstance(other, Geometry) and self.fields() == other.fields()
+
+    def __hash__(self):
+        return hash(self.fields())
+
+    def __str__(self):
+        label = f"{self.rows}x{self.cols}"
+        if self.park != (self.rows, 0):
+            label += f" park {self.park[1] + 1}"
+        if self.keel != self.cols // 2:
+            label += f" keel {self.keel}"
+        return label
+
+    def __repr__(self):
+        return f"Geometry(rows={self.rows}, cols={self.cols}, park={self.park}, keel={self.keel})"
+
+DEFAULT_GEOMETRY = Geometry()
+
+GEOMETRY_PATTERN = re.compile(r"\s*(\d+)\s*[xX]\s*(\d+)\s*")
+
+def parse_geometry(text):
+    #"ROWSxCOLS" (e.g. "10x16") -> Geometry with the default park and keel; blank means DEFAULT_GEOMETRY
+    if not text or not text.strip():
+        return DEFAULT_GEOMETRY
+    match = GEOMETRY_PATTERN.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Expected a bay size like '8x12', got '{text.strip()}'")
+    return Geometry(int(match.group(1)), int(match.group(2)))
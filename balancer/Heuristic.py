@@ -0,0 +1,115 @@
+from bisect import bisect_right
+from typing import List
+
+class Heuristic:
+    # HEURISTIC CLASS
+    # -------------
+    # Interface for the h_cost estimate used by Node and Problem. Subclasses override estimate().
+    # Functionality:
+    #   prepare() runs once per manifest on the initial ShipState, to precompute anything shared by all nodes
+    #   estimate() returns the h_cost of one node; the base class is Uniform Cost Search (h = 0)
+
+    name = "zero"
+    admissible = True #never overestimates, so A* with it returns optimal plans
+
+    def prepare(self, ship):
+        pass
+
+    def estimate(self, node):
+        return 0
+
+class GreedyHeuristic(Heuristic):
+    # GREEDY HEURISTIC CLASS
+    # -------------
+    # The original Node.calculate_h_cost: keel distances of the heaviest containers on the heavy side
+    # until the whole deficit is covered. Cheap, but can overestimate, so A* results are not guaranteed optimal.
+
+    name = "greedy"
+    admissible = False
+
+    def estimate(self, node):
+        return node.calculate_h_cost()
+
+class PartitionHeuristic(Heuristic):
+    # PARTITION HEURISTIC CLASS
+    # -------------
+    # Admissible lower bound from the weight partition the ship has to reach.
+    # Functionality:
+    #   Moving weight s across the keel shrinks the deficit by 2s, so reaching the 10% band needs
+    #   2s > deficit - 10% of total. prepare() stores prefix sums of all weights, heaviest first, so the
+    #   fewest containers k that can carry that much is one bisect per node
+    #   Those k containers cost at least their distance to the keel (cheapest k on the heavy side),
+    #   plus one column for every crane return across the keel in between
+    #   When the pre-solve found the band unreachable, the goal is the minimal imbalance instead
+
+    name = "partition"
+    admissible = True
+
+    doubled_prefix: List[int]
+
+    def __init__(self):
+        self.doubled_prefix = [0]
+
+    def prepare(self, ship):
+        weights = sorted((ship.table.weights[code] for _, _, code in ship.containers()), reverse=True)
+        self.doubled_prefix = [0]
+        for weight in weights:
+            self.doubled_prefix.append(self.doubled_prefix[-1] + 2 * weight)
+
+    def estimate(self, node):
+        if node.is_balanced():
+            return 0
+
+        ship = node.ship
+        portside_weight = ship.port_weight
+        starboard_weight = ship.starboard_weight
+        total_weight = portside_weight + starboard_weight
+        target = ship.table.target
+        if target is not None and not target.achievable:
+            needed = abs(portside_weight - starboard_weight) - target.min_imbalance - 1 #2s >= deficit - min_imbalance
+        else:
+            needed = abs(portside_weight - starboard_weight) - total_weight * 0.10
+
+        #fewest containers whose doubled weight exceeds the excess over the band
+        k = min(bisect_right(self.doubled_prefix, needed), len(self.doubled_prefix) - 1)
+        if k == 0:
+            return 1 #not balanced, so at least one move of at least one column
+
+        #heavy side columns ordered nearest to the keel first, with their keel distance
+        keel = ship.table.geometry.keel
+        if portside_weight > starboard_weight:
+            heavy_cols = [(c, keel - c) for c in range(keel - 1, -1, -1)]
+            crane_on_heavy = node.crane_pos[1] < keel
+        else:
+            heavy_cols = [(c, c - keel + 1) for c in range(keel, ship.table.geometry.cols)]
+            crane_on_heavy = node.crane_pos[1] >= keel
+
+        h = 0
+        remaining = k
+        for c, distance in heavy_cols:
+            take = min(remaining, len(ship.profiles[c][3]))
+            h += take * distance
+            remaining -= take
+            if remaining == 0:
+                break
+
+        #the crane crosses back to the heavy side before every carry but the first (and that one too if it starts across)
+        h += k - 1 if crane_on_heavy else k
+        return h
+
+HEURISTICS = {
+    Heuristic.name: Heuristic,
+    GreedyHeuristic.name: GreedyHeuristic,
+    PartitionHeuristic.name: PartitionHeuristic,
+}
+
+def make_heuristic(heuristic):
+    #accept a Heuristic instance, a registered name, or None for the default
+    if heuristic is None:
+        return GreedyHeuristic()
+    if isinstance(heuristic, Heuristic):
+        return heuristic
+    try:
+        return HEURISTICS[heuristic]()
+    except KeyError:
+        raise ValueError(f"Unknown heuristic '{heuristic}', expected one of {sorted(HEURISTICS)}")
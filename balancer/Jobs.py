@@ -0,0 +1,129 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+class SolveJob:
+    # SOLVE JOB CLASS
+    # -------------
+    # One background solve: the Problem being searched, its status and, once finished, its result.
+    # Functionality:
+    #   status goes queued -> running -> done / failed / cancelled
+    #   progress() reads the live search counters off the Problem while it runs
+    #   owner is the id of the operator who submitted it (see Sessions.py), None when anyone may see it
+
+    id: str
+    status: str
+    result: Optional[dict]
+    error: Optional[str]
+
+    def __init__(self, problem, filename="", owner=None):
+        self.id = uuid.uuid4().hex
+        self.problem = problem
+        self.filename = filename
+        self.owner = owner
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def progress(self):
+        if self.started_at is None:
+            elapsed = 0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        return {
+            "nodes_expanded": self.problem.stats.expanded,
+            "best_f_cost": self.problem.best_f_cost,
+            "elapsed": round(elapsed, 3),
+            "stats": self.problem.stats.to_json(),
+        }
+
+    def to_json(self):
+        data = {"id": self.id, "status": self.status, "filename": self.filename, "progress": self.progress()}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+class JobManager:
+    # JOB MANAGER CLASS
+    # -------------
+    # Runs solves on a small background thread pool so request handlers return right away.
+    # Functionality:
+    #   submit(problem, run) queues run(problem) and returns the SolveJob to poll; run's return value is the result
+    #   get() and cancel() given an owner only find that operator's jobs, so operators can't see each other's solves
+    #   cancel() drops a queued job or asks a running search to stop at its next budget check
+    #   Finished jobs are kept for keep_seconds so operators can still fetch their result
+    #   shutdown() cancels everything at exit, giving searches a chance to save their checkpoints
+
+    jobs: Dict[str, SolveJob]
+
+    def __init__(self, max_workers=2, keep_seconds=3600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="solve")
+        self.keep_seconds = keep_seconds
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, problem, run, filename="", owner=None):
+        job = SolveJob(problem, filename, owner)
+        with self.lock:
+            self.forget_finished()
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self.run_job, job, run)
+        return job
+
+    def run_job(self, job, run):
+        if job.status == "cancelled":
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = run(job.problem)
+            job.status = "cancelled" if job.problem.stop_reason == "cancelled" else "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id, owner=None):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def cancel(self, job_id, owner=None):
+        job = self.get(job_id, owner)
+        if job is None:
+            return None
+
+        if job.status == "queued" and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        elif job.status in ("queued", "running"):
+            job.problem.cancel()
+        return job
+
+    def shutdown(self, timeout=None):
+        #cancel every queued and running job, then wait up to timeout seconds for the searches to stop
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        futures = [job.future for job in jobs if job.future is not None]
+        wait(futures, timeout=timeout)
+
+    def forget_finished(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
@@ -0,0 +1,119 @@
+import re
+from typing import List, Optional, Tuple
+
+from .Node import Slot
+from .Geometry import Geometry, DEFAULT_GEOMETRY
+
+def outbound_filename(original_filename):
+    base_name = original_filename.replace(".txt", "")
+    return f"{base_name}OUTBOUND.txt"
+
+def format_outbound_manifest(ship_state):
+    #same fixed-width layout as the inbound manifests: [RR,CC], {WWWWW}, NAME
+    lines = []
+    for r, row in enumerate(ship_state):
+        for c, slot in enumerate(row):
+            lines.append(f"[{r+1:02},{c+1:02}], {{{slot.weight:05}}}, {slot.description}\n")
+    return "".join(lines)
+
+class ManifestError(ValueError):
+    # MANIFEST ERROR CLASS
+    # -------------
+    # A manifest that can't be turned into a full ship grid. line_number is 1-based, None for whole-file problems.
+
+    def __init__(self, message, line_number=None):
+        self.message = message
+        self.line_number = line_number
+        super().__init__(message if line_number is None else f"Line {line_number}: {message}")
+
+class ParsedManifest:
+    # PARSED MANIFEST CLASS
+    # -------------
+    # Result of parse_manifest: the full rows x cols grid of Slots for its Geometry plus what app.py reports about it.
+    # Problem accepts one in place of manifest text, so a manifest is only parsed once per request.
+
+    grid: Tuple[Tuple[Slot, ...], ...]
+    container_count: int
+    geometry: Geometry
+
+    def __init__(self, grid, container_count, geometry=DEFAULT_GEOMETRY):
+        self.grid = grid
+        self.container_count = container_count
+        self.geometry = geometry
+
+#fixed-width layout written by the ship's system and format_outbound_manifest: [RR,CC], {WWWWW}, NAME
+FIXED_WIDTH_LENGTH = 18
+#anything else that still reads as row, col, weight, name (extra spaces, fewer digits)
+LINE_PATTERN = re.compile(r"\[\s*(\d+)\s*,\s*(\d+)\s*\]\s*,\s*\{\s*(\d+)\s*\}\s*,\s*(.*)")
+MAX_WEIGHT = 99999
+MISSING_CELLS_SHOWN = 5
+
+def parse_manifest_line(line, line_number, geometry=DEFAULT_GEOMETRY):
+    #one non-blank line -> Slot, raising ManifestError for anything malformed or off the ship
+    if (len(line) >= FIXED_WIDTH_LENGTH and line[0] == "[" and line[3] == "," and line[6:10] == "], {"
+            and line[15:18] == "}, " and line[1:3].isdigit() and line[4:6].isdigit() and line[10:15].isdigit()):
+        row = int(line[1:3])
+        col = int(line[4:6])
+        weight = int(line[10:15])
+        description = line[18:].strip()
+    else:
+        match = LINE_PATTERN.fullmatch(line.strip())
+        if match is None:
+            raise ManifestError(f"Expected '[RR,CC], {{WWWWW}}, NAME', got '{line.strip()}'", line_number)
+        row, col, weight = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        description = match.group(4).strip()
+
+    if not 1 <= row <= geometry.rows or not 1 <= col <= geometry.cols:
+        raise ManifestError(f"Cell [{row:02},{col:02}] is off the {geometry.rows}x{geometry.cols} ship", line_number)
+    if weight > MAX_WEIGHT:
+        raise ManifestError(f"Weight {weight} is over the {MAX_WEIGHT} kg limit", line_number)
+    if not description:
+        raise ManifestError(f"Cell [{row:02},{col:02}] has no description", line_number)
+    if description in ("NAN", "UNUSED") and weight != 0:
+        raise ManifestError(f"{description} cell [{row:02},{col:02}] has weight {weight}", line_number)
+
+    return Slot(row=row - 1, col=col - 1, weight=weight, description=description)
+
+def iter_manifest_lines(source):
+    #text, a text stream, or a binary stream (e.g. an upload) -> lines, without reading streams in one go
+    if isinstance(source, str):
+        yield from source.splitlines()
+        return
+    for line in source:
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                raise ManifestError("File is not UTF-8 text")
+        yield line.rstrip("\r\n")
+
+def parse_manifest(source, geometry=DEFAULT_GEOMETRY):
+    #full manifest for a bay of this Geometry -> ParsedManifest; every cell must appear exactly once
+    grid: List[List[Optional[Slot]]] = [[None for _ in range(geometry.cols)] for _ in range(geometry.rows)]
+    seen_on_line = {}
+    container_count = 0
+
+    for line_number, line in enumerate(iter_manifest_lines(source), start=1):
+        if not line.strip():
+            continue
+
+        slot = parse_manifest_line(line, line_number, geometry)
+        cell = (slot.row, slot.col)
+        if cell in seen_on_line:
+            raise ManifestError(f"Cell [{slot.row+1:02},{slot.col+1:02}] is already listed on line {seen_on_line[cell]}", line_number)
+        seen_on_line[cell] = line_number
+
+        grid[slot.row][slot.col] = slot
+        if slot.description not in ("NAN", "UNUSED"):
+            container_count += 1
+
+    if not seen_on_line:
+        raise ManifestError("File is blank")
+
+    missing = [f"[{r+1:02},{c+1:02}]" for r in range(geometry.rows) for c in range(geometry.cols) if grid[r][c] is None]
+    if missing:
+        shown = ", ".join(missing[:MISSING_CELLS_SHOWN])
+        more = f" and {len(missing) - MISSING_CELLS_SHOWN} more" if len(missing) > MISSING_CELLS_SHOWN else ""
+        raise ManifestError(f"Missing {len(missing)} cell(s): {shown}{more}")
+
+    return ParsedManifest(tuple(tuple(row) for row in grid), container_count, geometry)
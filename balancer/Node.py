@@ -1,15 +1,27 @@
-from typing import Tuple, List, Optional
+import random
+from typing import Tuple, List, Dict, Optional
 
-SHIP_ROWS = 8
-SHIP_COLS = 12
+from .Geometry import Geometry, DEFAULT_GEOMETRY
 
-PARK_ROW = 8 
-PARK_COL = 0
+#every column is packed into one int, one byte-sized cell per row (row 0 in the lowest bits)
+CELL_BITS = 8
+CELL_MASK = (1 << CELL_BITS) - 1
+UNUSED_CELL = 0
+NAN_CELL = CELL_MASK
+
+ZOBRIST_SEED = 179 #fixed so state keys are reproducible between runs
+
+#successor pruning, see Node.get_successors:
+#  off        - every (top container, lowest open slot in another column) pair
+#  exact      - also drops moves that undo the parent's move; never prunes an optimal plan
+#  aggressive - also drops same-side moves that uncover nothing and keeps one of each group of
+#               same-weight containers on the same side per target slot; plans may cost more
+PRUNING_MODES = ("off", "exact", "aggressive")
 
 class Slot:
     # SLOT CLASS
     # -------------
-    # Represents one individual slot of the 8x12 grid. Row and Col are 0 indexed.
+    # Represents one individual slot of the bay grid (see Geometry.py). Row and Col are 0 indexed.
     # Functionality:
     #   Small class, likely some setter/getter functions, print functions for testing
     #   Keeps track of individual slot weight, desc/status, etc
@@ -25,55 +37,345 @@ class Slot:
         self.weight=weight
         self.description=description
 
+class ContainerTable:
+    # CONTAINER TABLE CLASS
+    # -------------
+    # Immutable lookup of every container on one manifest, shared by every ShipState built from it.
+    # Functionality:
+    #   Container ids are the cell codes stored in ShipState columns, numbered from 1 in manifest order
+    #   Id 0 is reserved for UNUSED so weights[UNUSED_CELL] == 0
+    #   Holds the Zobrist keys for state hashing: containers of equal weight share one key per cell,
+    #   so swapping them yields the same hash, and the crane has its own key per position (park included)
+    #   target is the pre-solve BalanceTarget (see Partition.py), set by Problem before searching
+    #   geometry is the bay's Geometry, which every ShipState and Node of the manifest reads through its table
+
+    weights: Tuple[int, ...]
+    descriptions: Tuple[str, ...]
+    profiles: Dict[int, Tuple[int, int, int, Tuple[int, ...]]]
+    zobrist: Tuple[Tuple[int, ...], ...]
+    crane_keys: Tuple[int, ...]
+    target: Optional["BalanceTarget"]
+    geometry: Geometry
+
+    def __init__(self, weights, descriptions, geometry=DEFAULT_GEOMETRY):
+        if len(weights) >= NAN_CELL:
+            raise ValueError(f"Too many containers for a {CELL_BITS}-bit cell: {len(weights) - 1}")
+
+        self.weights = tuple(weights)
+        self.descriptions = tuple(descriptions)
+        self.profiles = {}
+        self.target = None
+        self.geometry = geometry
+
+        rng = random.Random(ZOBRIST_SEED)
+        num_cells = geometry.rows * geometry.cols
+        keys_by_weight: Dict[int, Tuple[int, ...]] = {}
+        zobrist = []
+        for weight in self.weights:
+            keys = keys_by_weight.get(weight)
+            if keys is None:
+                keys = tuple(rng.getrandbits(64) for _ in range(num_cells))
+                keys_by_weight[weight] = keys
+            zobrist.append(keys)
+
+        self.zobrist = tuple(zobrist)
+        self.crane_keys = tuple(rng.getrandbits(64) for _ in range((geometry.rows + 1) * geometry.cols))
+
+    def column_profile(self, packed):
+        #(topmost container row, lowest UNUSED row, highest non-UNUSED row, container ids bottom-up) for one packed column
+        #only a handful of distinct columns show up during a search, so profiles are memoized per manifest
+        profile = self.profiles.get(packed)
+        if profile is not None:
+            return profile
+
+        rows = self.geometry.rows
+        top = -1
+        free = rows
+        peak = -1
+        codes = []
+        for r in range(rows):
+            code = (packed >> (r * CELL_BITS)) & CELL_MASK
+            if code == UNUSED_CELL:
+                if free == rows:
+                    free = r
+                continue
+
+            peak = r
+            if code != NAN_CELL:
+                top = r
+                codes.append(code)
+
+        profile = (top, free, peak, tuple(codes))
+        self.profiles[packed] = profile
+        return profile
+
+class ShipState:
+    # SHIP STATE CLASS
+    # -------------
+    # Compact, hashable ship layout: one packed int per column plus a shared ContainerTable.
+    # Functionality:
+    #   Build from / convert back to the Tuple[Tuple[Slot]] grid view used by Problem and app.py
+    #   Move one container, which only rewrites the source and target columns
+    #   Carry per-column profiles and side weights/counts, updated from the move instead of rescanned
+    #   Carry a Zobrist hash of container weights by position, updated from the move as well
+    #   gap_peaks() tabulates the tallest stack between every pair of columns the first time a move is costed,
+    #   so each crane path after that is O(1); children start without one and only expanded states build it
+
+    __slots__ = ("table", "columns", "profiles", "port_weight", "starboard_weight", "port_count", "starboard_count", "zobrist", "gaps")
+
+    table: ContainerTable
+    columns: Tuple[int, ...]
+    profiles: Tuple[Tuple[int, int, int, Tuple[int, ...]], ...]
+    port_weight: int
+    starboard_weight: int
+    port_count: int
+    starboard_count: int
+    zobrist: int
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns
+        self.profiles = tuple(table.column_profile(packed) for packed in columns)
+
+        weights = table.weights
+        keel = table.geometry.keel
+        self.port_weight = 0
+        self.starboard_weight = 0
+        self.port_count = 0
+        self.starboard_count = 0
+        for c, profile in enumerate(self.profiles):
+            codes = profile[3]
+            if c < keel:
+                self.port_weight += sum(weights[code] for code in codes)
+                self.port_count += len(codes)
+            else:
+                self.starboard_weight += sum(weights[code] for code in codes)
+                self.starboard_count += len(codes)
+
+        self.gaps = None
+        self.zobrist = 0
+        cols = len(columns)
+        for r, c, code in self.containers():
+            self.zobrist ^= table.zobrist[code][r * cols + c]
+
+    @classmethod
+    def from_grid(cls, grid, geometry=None):
+        #geometry defaults to the grid's own size with the default park and keel
+        if geometry is None:
+            geometry = Geometry(len(grid), len(grid[0]))
+        weights = [0]
+        descriptions = ["UNUSED"]
+        columns = [0] * geometry.cols
+
+        for r in range(geometry.rows):
+            for c in range(geometry.cols):
+                slot = grid[r][c]
+
+                if slot is None or slot.description == "NAN": #missing cells can't hold a container either
+                    code = NAN_CELL
+                elif slot.description == "UNUSED":
+                    code = UNUSED_CELL
+                else:
+                    code = len(weights)
+                    weights.append(slot.weight)
+                    descriptions.append(slot.description)
+
+                columns[c] |= code << (r * CELL_BITS)
+
+        return cls(ContainerTable(weights, descriptions, geometry), tuple(columns))
+
+    def cell(self, r, c):
+        return (self.columns[c] >> (r * CELL_BITS)) & CELL_MASK
+
+    def containers(self):
+        #(row, col, container id) for every container, column by column from the bottom up
+        found: List[Tuple[int,int,int]] = []
+        for c, packed in enumerate(self.columns):
+            r = 0
+            while packed:
+                code = packed & CELL_MASK
+                if code != NAN_CELL and code != UNUSED_CELL:
+                    found.append((r, c, code))
+                packed >>= CELL_BITS
+                r += 1
+        return found
+
+    def max_peak_between(self, c1, c2):
+        #highest non-UNUSED row strictly between two columns, -1 if they are adjacent or the gap is empty
+        gaps = self.gaps
+        if gaps is None:
+            gaps = self.gap_peaks()
+        return gaps[c1][c2]
+
+    def gap_peaks(self):
+        #gaps[c1][c2] = max_peak_between(c1, c2) for every pair, from a running max of column peaks per start column
+        peaks = [profile[2] for profile in self.profiles]
+        cols = len(peaks)
+        gaps = [[-1] * cols for _ in range(cols)]
+        for c1 in range(cols):
+            row = gaps[c1]
+            highest = -1
+            for c2 in range(c1 + 2, cols):
+                if peaks[c2 - 1] > highest:
+                    highest = peaks[c2 - 1]
+                row[c2] = highest
+                gaps[c2][c1] = highest
+        self.gaps = gaps
+        return gaps
+
+    def move(self, r1, c1, r2, c2):
+        table = self.table
+        geometry = table.geometry
+        code = self.cell(r1, c1)
+        weight = table.weights[code]
+
+        columns = list(self.columns)
+        columns[c1] &= ~(CELL_MASK << (r1 * CELL_BITS))
+        columns[c2] |= code << (r2 * CELL_BITS)
+
+        profiles = list(self.profiles)
+        profiles[c1] = table.column_profile(columns[c1])
+        profiles[c2] = table.column_profile(columns[c2])
+
+        child = ShipState.__new__(ShipState)
+        child.table = table
+        child.columns = tuple(columns)
+        child.profiles = tuple(profiles)
+        child.port_weight = self.port_weight
+        child.starboard_weight = self.starboard_weight
+        child.port_count = self.port_count
+        child.starboard_count = self.starboard_count
+
+        keys = table.zobrist[code]
+        cols = geometry.cols
+        child.zobrist = self.zobrist ^ keys[r1 * cols + c1] ^ keys[r2 * cols + c2]
+        child.gaps = None
+
+        keel = geometry.keel
+        from_port = c1 < keel
+        if from_port != (c2 < keel):
+            if from_port:
+                child.port_weight -= weight
+                child.starboard_weight += weight
+                child.port_count -= 1
+                child.starboard_count += 1
+            else:
+                child.port_weight += weight
+                child.starboard_weight -= weight
+                child.port_count += 1
+                child.starboard_count -= 1
+
+        return child
+
+    def to_grid(self):
+        weights = self.table.weights
+        descriptions = self.table.descriptions
+        grid = []
+        for r in range(self.table.geometry.rows):
+            row = []
+            for c in range(len(self.columns)):
+                code = self.cell(r, c)
+                if code == NAN_CELL:
+                    row.append(Slot(r, c, 0, "NAN"))
+                else:
+                    row.append(Slot(r, c, weights[code], descriptions[code]))
+            grid.append(tuple(row))
+        return tuple(grid)
+
 class Node:
     # NODE CLASS
     # -------------
-    # Represents state of the entire ship at one moment in time through Tuple[Tuple[Slot]]
+    # Represents state of the entire ship at one moment in time through a compact ShipState
     # Functionality:
-    #   Initialize with input of Tuple[Tuple[Slot]]
+    #   Initialize with input of ShipState; state gives the Tuple[Tuple[Slot]] grid view on demand
     #   Have a print function for testing purposes/possibly outbound manifets purposes
     #   Have operators for A*
     #   Keep track of costs such as balance ratio, heurtistic manhattan distance, etc
+    #   Cache a canonical state key (ship hash + crane position) for duplicate detection
     #   Have transformation/next state function (?)
+    #   release() drops the ShipState once a node is expanded; ship_state() replays it from the nearest
+    #   ancestor that still has one, so closed nodes cost little more than their move and costs
+
+    __slots__ = ("ship", "crane_pos", "key", "g_cost", "h_cost", "f_cost", "parent", "prev_state")
 
-    state: Tuple[Tuple[Slot]] #immutable
+    ship: Optional[ShipState]
     crane_pos: Tuple[int, int]
-    used_slots: List[Slot]
+    key: int
     f_cost: int
     g_cost: int
     h_cost: int
 
-    def __init__(self,current_ship, crane_pos=(PARK_ROW, PARK_COL), g_cost=0, parent=None, prev_state=None):
-        self.state = current_ship
+    def __init__(self,current_ship, crane_pos=None, g_cost=0, parent=None, prev_state=None, heuristic=None, h_cost=None):
+        table = current_ship.table
+        if crane_pos is None: #a new search starts with the crane parked
+            crane_pos = table.geometry.park
+        self.ship = current_ship
         self.crane_pos = crane_pos
-        self.used_slots = self.get_used_slots()
+        self.key = current_ship.zobrist ^ table.crane_keys[crane_pos[0] * table.geometry.cols + crane_pos[1]]
         self.g_cost = g_cost
-        self.h_cost = self.calculate_h_cost()
+        if h_cost is None: #callers that estimated a whole batch at once pass it in, see balancer/Vectorized.py
+            h_cost = heuristic.estimate(self) if heuristic else self.calculate_h_cost() #see balancer/Heuristic.py
+        self.h_cost = h_cost
         self.f_cost = self.g_cost + self.h_cost
         self.parent = parent
         self.prev_state = prev_state
-    
+
+    @property
+    def state(self):
+        #full grid view, rebuilt from the compact ship on every access
+        return self.ship_state().to_grid()
+
+    @property
+    def used_slots(self):
+        ship = self.ship_state()
+        weights = ship.table.weights
+        descriptions = ship.table.descriptions
+        return [Slot(r, c, weights[code], descriptions[code]) for r, c, code in ship.containers()]
+
+    @classmethod
+    def restore(cls, parent, prev_state, key, g_cost, h_cost):
+        #a released node rebuilt from a saved search (see Checkpoint.py); ship_state() replays its ship
+        node = cls.__new__(cls)
+        node.ship = None
+        node.crane_pos = prev_state[1]
+        node.key = key
+        node.g_cost = g_cost
+        node.h_cost = h_cost
+        node.f_cost = g_cost + h_cost
+        node.parent = parent
+        node.prev_state = prev_state
+        return node
+
+    def release(self):
+        #the root keeps its ship so every released node can be replayed from it
+        if self.parent is not None:
+            self.ship = None
+
+    def ship_state(self):
+        if self.ship is not None:
+            return self.ship
+
+        moves = []
+        node = self
+        while node.ship is None:
+            moves.append(node.prev_state)
+            node = node.parent
+
+        ship = node.ship
+        for (r1, c1), (r2, c2) in reversed(moves):
+            ship = ship.move(r1, c1, r2, c2)
+        return ship
+
     def get_used_slots(self):
-        used_slots: List[Slot] = []
-        for r in range(SHIP_ROWS):
-            for c in range(SHIP_COLS):
-                slot = self.state[r][c]
-                if slot and slot.description not in ("NAN", "UNUSED"):
-                    used_slots.append(slot)
-        return used_slots
+        return self.used_slots
 
     def is_balanced(self):
-        portside_weight = 0
-        starboard_weight = 0
-        
-        for slot in self.used_slots:
-            if slot.col < 6:
-                portside_weight += slot.weight
-            else:
-                starboard_weight += slot.weight
+        ship = self.ship
+        portside_weight = ship.port_weight
+        starboard_weight = ship.starboard_weight
 
         total_weight = portside_weight + starboard_weight
-        num_used_slots = len(self.used_slots)
+        num_used_slots = ship.port_count + ship.starboard_count
 
         #special case 1/2: Empty or 1-Container Ship
         if num_used_slots == 0 or num_used_slots == 1:
@@ -81,20 +383,18 @@ class Node:
 
         #special case 3: 2-Container Ship, Containers on opposite sides
         if num_used_slots == 2:
-            if (self.used_slots[0].col < 6 and self.used_slots[1].col >= 6) or (self.used_slots[0].col >= 6 and self.used_slots[1].col < 6):
+            if ship.port_count == 1:
                 return True
 
-        #default case 1: minimal (TO DO)
+        #default case 1: minimal, when the pre-solve showed the 10% rule can't be met by any arrangement
+        target = ship.table.target
+        if target is not None and not target.achievable:
+            return abs(portside_weight - starboard_weight) <= target.min_imbalance
 
         #default case 2: 10% variance
         return abs(portside_weight - starboard_weight) < (total_weight * 0.10)
     
     def test_func_print(self):
-        # for r in range(SHIP_ROWS):
-        #     for c in range(SHIP_COLS):
-        #         slot = self.state[r][c]
-        #         print(f"[{slot.row + 1}, {slot.col + 1}] {slot.weight} {slot.description}") #Does not prepend '0's onto 1-digit coordinates
-        #         print()
         for slot in self.used_slots:
             print(f"[{slot.row + 1}, {slot.col + 1}] {slot.weight} {slot.description}")
             print()
@@ -102,43 +402,40 @@ class Node:
     def calculate_h_cost(self):
         #lower h is better
         
-        portside_weight = 0
-        starboard_weight = 0
-        portside_containers = []
-        starboard_containers = []
+        ship = self.ship
+        weights = ship.table.weights
+        portside_weight = ship.port_weight
+        starboard_weight = ship.starboard_weight
         h = 0
 
-        #weigh each side, separate
-        for slot in self.used_slots:
-            if slot.col < 6:
-                portside_weight += slot.weight
-                portside_containers.append(slot)
-            else:
-                starboard_weight += slot.weight
-                starboard_containers.append(slot)
-        
         deficit =  abs(portside_weight - starboard_weight)
         
         #no difference in weight is good
         if deficit == 0: 
             return 0
 
+        geometry = ship.table.geometry
         if (portside_weight > starboard_weight):
-            heavy = portside_containers
-            col_range = range(6, 12) #opposite side range
+            heavy_cols = range(0, geometry.keel)
         else:
-            heavy = starboard_containers
-            col_range = range(0, 6) #opposite side range
+            heavy_cols = range(geometry.keel, geometry.cols)
+
+        #(weight, distance to the nearest column across the keel) for every heavy side container
+        heavy = []
+        for col in heavy_cols:
+            distance = geometry.keel_distance(col)
+            for code in ship.profiles[col][3]:
+                heavy.append((weights[code], distance))
         
-        heavy_sorted = sorted(heavy, key=lambda container: container.weight, reverse=True)
+        heavy_sorted = sorted(heavy, key=lambda container: container[0], reverse=True)
         leftover_deficit = deficit
 
-        for container in heavy_sorted:
+        for weight, distance in heavy_sorted:
             if leftover_deficit <= 0:
                 break
             
-            h += min(abs(container.col - c) for c in col_range)
-            leftover_deficit -= container.weight
+            h += distance
+            leftover_deficit -= weight
             
         return h
 
@@ -147,18 +444,10 @@ class Node:
     def adjusted_manhattan_distance(self, r1, c1, r2, c2):
         #function must not ghost through containers
         #lift distance + horizontal distance + drop distance
+        #used for the loaded move and for the empty crane's trip to the pick, which can't pass through stacks either
         
         #helper calculation: find tallest intermediate row (exclusive)
-        tallest_intermediate_row = -1
-
-        start_c = min(c1,c2)
-        end_c = max(c1,c2)
-
-        for c in range(start_c+1, end_c):
-            for r in range(SHIP_ROWS):
-                slot = self.state[r][c]
-                if slot.description != "UNUSED":
-                    tallest_intermediate_row = max(tallest_intermediate_row,r)
+        tallest_intermediate_row = self.ship.max_peak_between(c1, c2)
 
         #lift
 
@@ -169,6 +458,11 @@ class Node:
             lift_distance = tallest_intermediate_row + 1 - r1
             curr_row = tallest_intermediate_row + 1
 
+        #the target column's own stack can be taller than the intermediates; without this the drop went negative
+        if r2 > curr_row:
+            lift_distance += r2 - curr_row
+            curr_row = r2
+
         #horizontal
         horizontal_distance = abs(c2 - c1) #min value = 0 (no move)
 
@@ -177,66 +471,95 @@ class Node:
 
         return lift_distance + horizontal_distance + drop_distance
 
-    def get_successors(self):
+    def step_cost(self, r1, c1, r2, c2):
+        #empty crane travel to the container, then the lifted move to the target slot
+        curr_crane_r, curr_crane_c = self.crane_pos
+        crane_travel_dist = self.adjusted_manhattan_distance(curr_crane_r, curr_crane_c, r1, c1)
+        return crane_travel_dist + self.adjusted_manhattan_distance(r1, c1, r2, c2)
+
+    def apply_move(self, move, heuristic=None):
+        #child node for one ((from_r, from_c), (to_r, to_c)) move, which must be legal in this state
+        (r1, c1), (r2, c2) = move
+        cols = self.ship.table.geometry.cols
+        if not (0 <= c1 < cols and 0 <= c2 < cols) or c1 == c2:
+            raise ValueError(f"Illegal move {move}: columns must differ and be on the ship")
+        if self.ship.profiles[c1][0] != r1:
+            raise ValueError(f"Illegal move {move}: [{r1+1},{c1+1}] is not the top container of its column")
+        if self.ship.profiles[c2][1] != r2:
+            raise ValueError(f"Illegal move {move}: [{r2+1},{c2+1}] is not the lowest open slot of its column")
+
+        return self.make_child(r1, c1, r2, c2, self.step_cost(r1, c1, r2, c2), heuristic)
+
+    def get_successors(self, heuristic=None, pruning="exact", ordered=False):
+        #ordered=True returns the children most promising first: lowest f_cost, then lowest h_cost
         successors: List[Node] = [] #successors is a list of nodes
 
         #what containers can move? containers that exist and have nothing above them (topmost) per column
-        candidate_containers: List[Slot] = []
+        candidate_containers: List[Tuple[int,int]] = []
 
         #where can valid containers move? UNUSED slots, not NAN slots. Only in the lowest unused row per column
         candidate_slots: List[Tuple[int,int]] = [] #just list the row and col, don't need other slot info
 
-        #iterate through each column, searching for candidate containers or slots from node state
-        for c in range(SHIP_COLS):
-            #check rows
-            topmost_container = None
-            lowest_candidate = None
-
-            for r in range(SHIP_ROWS):
-                slot = self.state[r][c]
-                
-                if slot.description not in ("UNUSED", "NAN"):
-                    topmost_container = slot  #will continously update as rows increase
-                elif slot.description == "UNUSED" and lowest_candidate is None: #first open row found
-                    lowest_candidate = r
-
-            if topmost_container: 
-                candidate_containers.append(topmost_container)
-            if lowest_candidate is not None:
-                candidate_slots.append((lowest_candidate, c))
+        #read the topmost container and lowest open row of each column from the ship's column profiles
+        geometry = self.ship.table.geometry
+        for c, (top, free, _, _) in enumerate(self.ship.profiles):
+            if top >= 0: 
+                candidate_containers.append((top, c))
+            if free < geometry.rows:
+                candidate_slots.append((free, c))
             
+        #moving the parent's container straight back repeats the grandparent's ship with the crane
+        #somewhere no better, at a higher cost, so it never leads to a cheaper plan
+        reversal = None
+        if pruning != "off" and self.prev_state is not None:
+            (from_r, from_c), (to_r, to_c) = self.prev_state
+            reversal = ((to_r, to_c), (from_r, from_c))
+        aggressive = pruning == "aggressive"
+
         #generate successor nodes with candidate_containers and candidate_slots
-        for container in candidate_containers:
+        cheapest = {} #aggressive only: (target, weight, side) -> cheapest source of that weight on that side
+        for containerR, containerC in candidate_containers:
+            source_port = containerC < geometry.keel
             for targetR, targetC in candidate_slots:
-                if targetC == container.col:
+                if targetC == containerC:
+                    continue
+                if reversal is not None and reversal == ((containerR, containerC), (targetR, targetC)):
                     continue
 
-                curr_crane_r, curr_crane_c = self.crane_pos
-                crane_travel_dist = abs(curr_crane_r - container.row) + abs(curr_crane_c - container.col)
-                
-                move_dist = self.adjusted_manhattan_distance(container.row, container.col, targetR, targetC)
-                
-                step_cost = crane_travel_dist + move_dist
-                cumulative_cost = self.g_cost + step_cost
-
-                new_state = [list(row) for row in self.state]
-                
-                new_container = Slot(targetR, targetC, container.weight, container.description)
-                new_empty = Slot(container.row, container.col, 0, "UNUSED")
-                
-                new_state[targetR][targetC] = new_container
-                new_state[container.row][container.col] = new_empty
-                
-                new_state_tuple = tuple(tuple(row) for row in new_state)
-
-                new_node = Node(
-                    new_state_tuple,
-                    crane_pos=(targetR, targetC), 
-                    g_cost=cumulative_cost,
-                    parent=self,
-                    prev_state=((container.row, container.col), (targetR, targetC))
-                )
-
-                successors.append(new_node)
-        
+                step_cost = self.step_cost(containerR, containerC, targetR, targetC)
+                if aggressive:
+                    if source_port == (targetC < geometry.keel) and self.uncovers_nothing(containerR, containerC):
+                        continue #balance is unchanged and nothing underneath becomes reachable
+
+                    #containers of equal weight on the same side are interchangeable for balance
+                    group = (targetR, targetC, self.ship.table.weights[self.ship.cell(containerR, containerC)], source_port)
+                    best = cheapest.get(group)
+                    if best is None or step_cost < best[0]:
+                        cheapest[group] = (step_cost, containerR, containerC)
+                    continue
+
+                successors.append(self.make_child(containerR, containerC, targetR, targetC, step_cost, heuristic))
+
+        for (targetR, targetC, _, _), (step_cost, containerR, containerC) in cheapest.items():
+            successors.append(self.make_child(containerR, containerC, targetR, targetC, step_cost, heuristic))
+
+        if ordered:
+            successors.sort(key=lambda child: (child.f_cost, child.h_cost))
         return successors
+
+    def make_child(self, r1, c1, r2, c2, step_cost, heuristic, h_cost=None):
+        positions = self.ship.table.geometry.positions
+        target = positions[r2][c2]
+        return Node(
+            self.ship.move(r1, c1, r2, c2),
+            crane_pos=target,
+            g_cost=self.g_cost + step_cost,
+            parent=self,
+            prev_state=(positions[r1][c1], target),
+            heuristic=heuristic,
+            h_cost=h_cost
+        )
+
+    def uncovers_nothing(self, r, c):
+        #True if the container at [r, c] sits on the floor or on a NAN slot
+        return r == 0 or self.ship.cell(r - 1, c) == NAN_CELL
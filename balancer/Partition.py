@@ -0,0 +1,105 @@
+from math import gcd
+from typing import List
+
+from .Node import CELL_BITS, CELL_MASK, NAN_CELL
+
+class BalanceTarget:
+    # BALANCE TARGET CLASS
+    # -------------
+    # Result of the pre-solve: whether the 10% rule can be met at all, and if not, the best imbalance any
+    # arrangement can reach. Node.is_balanced() uses min_imbalance as its goal when achievable is False.
+
+    achievable: bool
+    min_imbalance: int
+
+    def __init__(self, achievable, min_imbalance):
+        self.achievable = achievable
+        self.min_imbalance = min_imbalance
+
+def side_capacities(ship):
+    #number of non-NAN slots on the port and starboard side
+    geometry = ship.table.geometry
+    port_capacity = 0
+    starboard_capacity = 0
+    for c, packed in enumerate(ship.columns):
+        usable = sum(1 for r in range(geometry.rows) if (packed >> (r * CELL_BITS)) & CELL_MASK != NAN_CELL)
+        if c < geometry.keel:
+            port_capacity += usable
+        else:
+            starboard_capacity += usable
+    return port_capacity, starboard_capacity
+
+def reachable_port_sums(weights: List[int], port_capacity, starboard_capacity):
+    #subset-sum DP: bitset of every portside weight total some arrangement can reach,
+    #only counting splits where each side's containers fit in that side's slots
+    n = len(weights)
+    min_port = max(0, n - starboard_capacity)
+    max_port = min(n, port_capacity)
+    if min_port > max_port:
+        return 0
+
+    if min_port == 0 and max_port == n:
+        #capacities never bind, one bitset is enough
+        sums = 1
+        for weight in weights:
+            sums |= sums << weight
+        return sums
+
+    #by_count[k] = bitset of portside totals using exactly k containers
+    by_count = [0] * (max_port + 1)
+    by_count[0] = 1
+    for i, weight in enumerate(weights):
+        for k in range(min(i, max_port - 1), -1, -1):
+            if by_count[k]:
+                by_count[k + 1] |= by_count[k] << weight
+
+    sums = 0
+    for k in range(min_port, max_port + 1):
+        sums |= by_count[k]
+    return sums
+
+def find_balance_target(ship):
+    weights = [ship.table.weights[code] for _, _, code in ship.containers()]
+    current_imbalance = abs(ship.port_weight - ship.starboard_weight)
+    port_capacity, starboard_capacity = side_capacities(ship)
+    n = len(weights)
+
+    #special cases of Node.is_balanced: empty/1-container ships, and 2 containers that can sit on opposite sides
+    if n <= 1 or (n == 2 and port_capacity >= 1 and starboard_capacity >= 1):
+        return BalanceTarget(True, 0)
+
+    #a full ship has no legal move, so whatever it holds now is the best it can do
+    if n >= port_capacity + starboard_capacity:
+        return BalanceTarget(within_band(current_imbalance, ship.port_weight + ship.starboard_weight), current_imbalance)
+
+    #imbalances only depend on the weight ratios, so shrink every weight by their common divisor first
+    divisor = 0
+    for weight in weights:
+        divisor = gcd(divisor, weight)
+    divisor = divisor or 1
+    scaled = [weight // divisor for weight in weights]
+    total = sum(scaled)
+
+    sums = reachable_port_sums(scaled, port_capacity, starboard_capacity)
+    if not sums: #no split fits, nothing can move anywhere useful
+        return BalanceTarget(False, current_imbalance)
+
+    #the best split is the reachable portside total closest to half: the largest one at or below it,
+    #or the smallest one at or above it
+    half = total // 2
+    best = None
+    below = sums & ((1 << (half + 1)) - 1)
+    if below:
+        best = total - 2 * (below.bit_length() - 1)
+    above = sums >> half
+    if above:
+        port_sum = half + (above & -above).bit_length() - 1
+        imbalance = abs(2 * port_sum - total)
+        if best is None or imbalance < best:
+            best = imbalance
+
+    return BalanceTarget(within_band(best * divisor, total * divisor), best * divisor)
+
+def within_band(imbalance, total_weight):
+    #default case 2 of Node.is_balanced: 10% variance
+    return imbalance < (total_weight * 0.10)
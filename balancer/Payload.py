@@ -0,0 +1,48 @@
+import hashlib
+import json
+
+from .Geometry import DEFAULT_GEOMETRY
+
+PAYLOAD_VERSION = 1 #bump when the layout below changes, the page checks it
+
+def solution_payload(grid, steps=(), total_time=0, total_cost=0, geometry=DEFAULT_GEOMETRY):
+    #compact view of a manifest and its plan for the operator page.
+    #Cells are flat row-major indices (row * cols + col) into parallel weight/name columns, and each step is
+    #the diff it makes: the cell it empties, the cell it fills and what fills it, so the page never rebuilds frames
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    weights = [slot.weight for row in grid for slot in row]
+    names = [slot.description for row in grid for slot in row]
+
+    step_from = []
+    step_to = []
+    step_weights = []
+    step_names = []
+    current_weights = list(weights)
+    current_names = list(names)
+    for (r1, c1), (r2, c2) in steps:
+        source = r1 * cols + c1
+        target = r2 * cols + c2
+        step_from.append(source)
+        step_to.append(target)
+        step_weights.append(current_weights[source])
+        step_names.append(current_names[source])
+
+        current_weights[target], current_names[target] = current_weights[source], current_names[source]
+        current_weights[source], current_names[source] = 0, "UNUSED"
+
+    return {
+        "version": PAYLOAD_VERSION,
+        "rows": rows,
+        "cols": cols,
+        "park": list(geometry.park),
+        "grid": {"weight": weights, "name": names},
+        "steps": {"from": step_from, "to": step_to, "weight": step_weights, "name": step_names},
+        "total_time": total_time,
+        "total_cost": total_cost,
+    }
+
+def encode_payload(payload):
+    #(JSON bytes, ETag): serialized once, the ETag is the content hash so equal payloads share it
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return body, hashlib.sha256(body).hexdigest()[:32]
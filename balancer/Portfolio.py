@@ -0,0 +1,176 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import time
+from typing import Dict, List, Optional
+
+from .Heuristic import make_heuristic
+from .Stats import SearchStats
+
+#raced by default: a fast rough plan first, then better plans, then a search that can prove the optimum.
+#Each entry is extra keyword arguments for Problem
+PORTFOLIO = (
+    {"strategy": "weighted", "heuristic": "greedy", "weight": 3.0},
+    {"strategy": "beam", "heuristic": "partition", "beam_width": 64},
+    {"strategy": "weighted", "heuristic": "partition", "weight": 1.5},
+    {"strategy": "astar", "heuristic": "partition"},
+)
+POLL_SECONDS = 0.05
+PROGRESS_EVERY = 2000 #expansions between progress messages from a worker
+
+def config_label(config):
+    #short name for logs, e.g. "weighted/greedy x3.0"
+    strategy = config.get("strategy", "astar")
+    label = f"{strategy}/{config.get('heuristic') or 'greedy'}"
+    if strategy == "weighted" and "weight" in config:
+        label += f" x{config['weight']}"
+    if strategy == "beam" and "beam_width" in config:
+        label += f" width {config['beam_width']}"
+    return label
+
+def proves_optimum(config):
+    #a finished search of this configuration has the cheapest plan, and its f_cost bound is a lower bound
+    return config.get("strategy", "astar") in ("astar", "ida") and make_heuristic(config.get("heuristic")).admissible
+
+def run_config(index, manifest, config, options, results):
+    #worker process: solve with one configuration, sending every plan and regular progress back on results
+    from .Problem import Problem #Problem runs portfolios, so it can't be imported at the top
+
+    def send_plan(node, total_time):
+        results.put(("plan", index, problem.get_moves(node), node.g_cost, total_time, False))
+
+    def send_progress(stats):
+        results.put(("progress", index, stats.to_json(), problem.best_f_cost))
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()): #the searches print every move
+            problem = Problem(manifest, on_solution=send_plan, on_progress=send_progress, progress_every=PROGRESS_EVERY, **options, **config)
+            problem.solve()
+    except Exception as e:
+        results.put(("failed", index, str(e)))
+        return
+
+    if problem.final_node is not None:
+        optimal = problem.stop_reason is None and proves_optimum(config)
+        results.put(("plan", index, problem.get_moves(problem.final_node), problem.final_node.g_cost, problem.final_time_minutes, optimal))
+    results.put(("done", index, problem.stats.to_json(), problem.best_f_cost))
+
+class Portfolio:
+    # PORTFOLIO CLASS
+    # -------------
+    # Races several search configurations on one manifest, each in its own process, for Problem's "portfolio" strategy.
+    # Functionality:
+    #   run() starts up to `workers` configurations at once (queueing the rest) and returns the cheapest plan found:
+    #   {"moves", "g_cost", "total_time", "label", "optimal"}, or None
+    #   Every cheaper plan goes to on_plan(plan) as soon as it arrives, so callers have an answer early
+    #   The race ends when a plan is proven optimal (a finished admissible A*/IDA*, or the A* lower bound
+    #   reaching the best plan's cost), when every configuration has finished, at the time_limit,
+    #   or when should_stop() returns True; stop_reason is then None, "time" or "cancelled" like Problem's
+    #   stats sums the workers' latest counters (max_open too: the processes hold their frontiers at the same time)
+    #   Workers are spawned, so a script that runs a portfolio needs the usual `if __name__ == "__main__":` guard
+
+    configs: List[dict]
+    best: Optional[dict]
+
+    def __init__(self, manifest, configs=PORTFOLIO, options=None, time_limit=None, workers=None, on_plan=None, on_progress=None, should_stop=None, stats=None):
+        self.manifest = manifest
+        self.configs = list(configs)
+        self.options = dict(options or {}, time_limit=time_limit) #passed to every worker's Problem
+        self.time_limit = time_limit
+        self.workers = workers or min(len(self.configs), os.cpu_count() or 1)
+        self.on_plan = on_plan
+        self.on_progress = on_progress
+        self.should_stop = should_stop
+        self.stats = stats if stats is not None else SearchStats()
+        self.best = None
+        self.lower_bound = None
+        self.stop_reason = None
+        self.snapshots: Dict[int, dict] = {}
+
+    def run(self):
+        #spawn, not fork: the app races portfolios from a threaded server, and a child forked while another thread
+        #holds a lock (logging, a cache, the import lock) would wait on it forever. Workers start a fresh interpreter
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        pending = list(range(len(self.configs)))
+        running = {}
+        start_time = time.time()
+
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    index = pending.pop(0)
+                    worker = context.Process(target=run_config, args=(index, self.manifest, self.configs[index], self.options, results), daemon=True)
+                    worker.start()
+                    running[index] = worker
+
+                if self.should_stop is not None and self.should_stop():
+                    self.stop_reason = "cancelled"
+                    break
+                if self.time_limit is not None and time.time() - start_time > self.time_limit:
+                    self.stop_reason = "time"
+                    break
+
+                try:
+                    message = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    for index, worker in list(running.items()): #crashed without a word, e.g. out of memory
+                        if not worker.is_alive():
+                            self.reap(running, index)
+                    continue
+
+                if self.handle(message, running):
+                    break
+        finally:
+            for worker in running.values():
+                worker.terminate()
+            for worker in running.values():
+                worker.join()
+            self.stats.elapsed = time.time() - start_time
+
+        return self.best
+
+    def handle(self, message, running):
+        #True once the best plan is known to be optimal
+        kind, index = message[0], message[1]
+        if kind == "plan":
+            _, _, moves, g_cost, total_time, optimal = message
+            if self.best is None or g_cost < self.best["g_cost"]:
+                self.best = {"moves": moves, "g_cost": g_cost, "total_time": total_time, "label": config_label(self.configs[index]), "optimal": False}
+                if self.on_plan is not None:
+                    self.on_plan(self.best)
+            if optimal:
+                self.best["optimal"] = True
+                return True
+
+        elif kind in ("progress", "done"):
+            self.snapshots[index] = message[2]
+            self.merge_stats()
+            if proves_optimum(self.configs[index]) and message[3] is not None:
+                if self.lower_bound is None or message[3] > self.lower_bound:
+                    self.lower_bound = message[3]
+            if kind == "done":
+                self.reap(running, index)
+            if self.on_progress is not None:
+                self.on_progress(self.stats)
+
+        elif kind == "failed":
+            print(f"Portfolio entry {config_label(self.configs[index])} failed: {message[2]}")
+            self.reap(running, index)
+
+        if self.best is not None and self.lower_bound is not None and self.lower_bound >= self.best["g_cost"]:
+            self.best["optimal"] = True
+            return True
+        return False
+
+    def reap(self, running, index):
+        worker = running.pop(index, None)
+        if worker is not None:
+            worker.join()
+
+    def merge_stats(self):
+        fields = ("generated", "expanded", "deduplicated", "reopened", "max_open", "successor_seconds", "heuristic_seconds", "hashing_seconds")
+        for field in fields:
+            setattr(self.stats, field, sum(snapshot[field] for snapshot in self.snapshots.values()))
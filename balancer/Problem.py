@@ -1,125 +1,615 @@
-import sys
+import os
 import heapq
-from typing import Tuple, List, Dict #is this a repeated import?
-from .Node import Node, Slot, SHIP_ROWS, SHIP_COLS
+import time
+from typing import Tuple, List
+from .Node import Node, ShipState, PRUNING_MODES
+from .Geometry import DEFAULT_GEOMETRY
+from .Transposition import TranspositionTable
+from .Heuristic import make_heuristic
+from .Partition import BalanceTarget, find_balance_target
+from .Cache import manifest_key
+from .Manifest import ParsedManifest, parse_manifest
+from .Stats import SearchStats, TimedHeuristic
+from .Vectorized import SuccessorExpander, sort_children, HAVE_NUMPY
+from .Portfolio import Portfolio, PORTFOLIO
+from .Checkpoint import SearchCheckpoint
+from .Repair import repair_plan
+
+CHECKPOINT_CHECK_EVERY = 256 #expansions between looks at the checkpoint clock
 
 class Problem: 
     # PROBLEM CLASS 
     # -------------
     # Represents entire problem given filename of unedited, initial manifest.
     # Functionality:
-    #   Receive manifest text input
+    #   Receive manifest text input, or a ParsedManifest already read by the caller (see Manifest.py)
+    #   geometry is the bay's Geometry (see Geometry.py) for manifest text; a ParsedManifest carries its own
     #   Read initial manifest, convert to Node form and store in initial_state
     #   Have some sort of solve() function (?)
     #   Ideally recieve filename/produce filenameOUTBOUND for modularity
+    #   Pick the A* heuristic by name or instance ("greedy", "partition", "zero"), see Heuristic.py
+    #   Pre-solve the best reachable balance (see Partition.py) so unbalanceable ships aim for the minimal imbalance
+    #   solve() runs one of STRATEGIES, optionally bounded by a time_limit (seconds) and max_nodes (stored nodes):
+    #     astar    - optimal with an admissible heuristic, keeps every generated state
+    #     weighted - A* with f = g + weight * h, cost within weight x optimal, far fewer expansions
+    #     ida      - iterative deepening A*, optimal like astar in memory linear in the plan length
+    #     beam     - anytime beam search, reports each better plan to on_solution(node, total_time) as it finds it
+    #     portfolio - races the `portfolio` configurations (default PORTFOLIO) in separate processes, see Portfolio.py.
+    #                 Streams every cheaper plan to on_solution and returns the best one at the time_limit, or
+    #                 earlier once it is proven optimal or every configuration has finished
+    #   pruning picks how get_successors trims moves, one of PRUNING_MODES (see Node.py); "exact" keeps A* optimal
+    #   vectorized=True has the A* strategies (astar and weighted) expand nodes with NumPy (see Vectorized.py):
+    #   same plans and stats, fewer Nodes built. Needs NumPy; "aggressive" pruning stays on the plain path.
+    #   On an 8x12 bay a node has ~10 moves, too few to pay for NumPy's per-call overhead, so it is off by default
+    #   cancel() may be called from another thread; the search stops at its next budget check
+    #   stats (see Stats.py) and best_f_cost can be read from another thread to report progress;
+    #   on_progress(stats) is also called every progress_every expansions
+    #   With a SolutionCache (see Cache.py), solve() first looks the manifest up by content and replays a stored plan;
+    #   plans of warm-started solves are not stored, since the previous plan isn't part of the key
+    #   With a checkpoint_path, the A* strategies save their search there every checkpoint_every seconds and when a
+    #   budget or cancel stops them, and the next solve with the same manifest and settings resumes from it
+    #   (see Checkpoint.py), so a hard manifest can be searched in several time slices. Finishing removes the file
+    #   With previous_manifest and previous_moves (the plan solved for it), a corrected manifest is re-solved
+    #   warm: the old plan is repaired for the edits (see Repair.py) and its cost bounds the search, which prunes
+    #   every node that can't beat it (on g_cost + h_cost with an admissible heuristic, on g_cost otherwise).
+    #   The repaired plan is the answer only when the search finds nothing cheaper or its budget runs out
 
     initial_state: Node
+    balance_target: BalanceTarget
+
+    STRATEGIES = ("astar", "weighted", "ida", "beam", "portfolio")
+
+    def __init__(self, manifest_text, heuristic=None, strategy="astar", weight=2.0, beam_width=64, time_limit=None, max_nodes=None, on_solution=None, cache=None, on_progress=None, progress_every=1000, pruning="exact", vectorized=False, portfolio=PORTFOLIO, portfolio_workers=None, checkpoint_path=None, checkpoint_every=60.0, previous_manifest=None, previous_moves=None, geometry=DEFAULT_GEOMETRY):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {self.STRATEGIES}")
+        if pruning not in PRUNING_MODES:
+            raise ValueError(f"Unknown pruning mode '{pruning}', expected one of {PRUNING_MODES}")
 
-    def __init__(self, manifest_text):
+        if vectorized and not HAVE_NUMPY:
+            raise ValueError("vectorized=True needs NumPy installed")
+
+        self.stats = SearchStats()
+        self.heuristic = TimedHeuristic(make_heuristic(heuristic), self.stats)
+        self.strategy = strategy
+        self.pruning = pruning
+        self.vectorized = vectorized
+        self.portfolio = portfolio
+        self.portfolio_workers = portfolio_workers
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.incumbent = None
+        self.previous_moves = previous_moves
+        self.repaired_plan = None
+        self.weight = weight
+        self.beam_width = beam_width
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.on_solution = on_solution
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+        self.cache = cache
+        self.cache_hit = False
+        self.start_time = None
+        self.stop_reason = None
+        self.cancel_requested = False
+        self.best_f_cost = None
+        self.final_node = None
+        self.final_time_minutes = 0
+        self.geometry = geometry
         self.initial_state = self.create_initial_node(manifest_text)
+        self.previous_manifest = previous_manifest if previous_manifest is None or isinstance(previous_manifest, ParsedManifest) else parse_manifest(previous_manifest, self.geometry)
+        self.expander = SuccessorExpander(self.initial_state.ship.table, self.heuristic.heuristic) if vectorized else None
 
     def read_initial_manifest(self, manifest_text):
-        ship_state: List[List[Slot|None]] = [[None for _ in range(SHIP_COLS)] for _ in range(SHIP_ROWS)]
-        slots_count = 0
-
-        for line in manifest_text.splitlines():
-            line = line.strip()
-                
-            try:
-                parts = line.split(',')
-                row = int(parts[0].strip('[')) - 1
-                col = int(parts[1].strip(']')) - 1
-                weight = int(parts[2].strip().strip('{').strip('}'))
-                description = parts[3].strip()
-                            
-                slot = Slot(
-                    row=row,
-                    col=col,
-                    weight=weight,
-                    description=description
-                )
-
-            except Exception as error:
-                continue
-
-            ship_state[slot.row][slot.col] = slot
-            slots_count += 1
-                
-            
-        ship_tuple = tuple(tuple(s) for s in ship_state)
-        return ship_tuple
+        #raises ManifestError (a ValueError) with the line number of the first bad line
+        if isinstance(manifest_text, ParsedManifest):
+            self.manifest = manifest_text
+            self.geometry = manifest_text.geometry
+        else:
+            self.manifest = parse_manifest(manifest_text, self.geometry)
+        return self.manifest.grid
         
     def create_initial_node(self, manifest_text):
         initial_manifest = self.read_initial_manifest(manifest_text)
-        return Node(initial_manifest)
+        initial_ship = ShipState.from_grid(initial_manifest, self.geometry)
+        self.balance_target = find_balance_target(initial_ship)
+        initial_ship.table.target = self.balance_target #shared by every state, read by Node.is_balanced
+        self.heuristic.prepare(initial_ship)
+        return Node(initial_ship, heuristic=self.heuristic)
+
+    def solve(self):
+        if self.cache is None:
+            return self.run_strategy()
+
+        key = self.cache_key()
+        if self.solve_from_cache(key):
+            return
+        self.run_strategy()
+
+        #only complete searches are worth keeping; a budget-cut beam plan may not be the best one.
+        #A warm-started answer depends on the previous plan too, which the key doesn't cover
+        if self.final_node is not None and self.stop_reason is None and not self.has_previous_plan():
+            self.cache.put(key, {
+                "moves": self.get_moves(self.final_node),
+                "total_cost": self.final_node.g_cost,
+                "total_time": self.final_time_minutes,
+            })
+
+    def run_strategy(self):
+        #run the configured search strategy, see STRATEGIES
+        if self.strategy == "astar":
+            return self.run_a_star()
+        if self.strategy == "weighted":
+            return self.run_a_star(weight=self.weight)
+        if self.strategy == "ida":
+            return self.run_ida_star()
+        if self.strategy == "portfolio":
+            return self.run_portfolio()
+        return self.run_beam_search()
+
+    def cache_key(self):
+        #the same layout can have different plans under different search settings
+        config = f"{self.strategy}|{self.heuristic.name}|{self.weight}|{self.beam_width}|{self.pruning}"
+        return manifest_key(self.initial_state.ship, config)
+
+    def solve_from_cache(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return False
+
+        self.start_search()
+        try:
+            goal_node = self.replay(entry["moves"])
+        except (KeyError, ValueError):
+            return False #stale or damaged entry, search again and overwrite it
+        if not goal_node.is_balanced():
+            return False
+
+        print("Found cached solution.")
+        self.cache_hit = True
+        if goal_node is self.initial_state:
+            print("Initial state is balanced.")
+            self.solution_log(goal_node)
+        else:
+            self.report_solution(goal_node)
+        return True
+
+    def replay(self, moves):
+        #rebuild the node chain for a list of ((from_r, from_c), (to_r, to_c)) moves from the initial state.
+        #Moves are positions, so containers pick up this manifest's descriptions along the way
+        node = self.initial_state
+        for move in moves:
+            node = node.apply_move(move, self.heuristic)
+        return node
+
+    def start_search(self):
+        self.start_time = time.time()
+        self.stop_reason = None
+        self.stats = SearchStats()
+        self.heuristic.stats = self.stats
+
+    def finish_search(self):
+        self.stats.elapsed = time.time() - self.start_time
+
+    def count_expansion(self):
+        stats = self.stats
+        stats.expanded += 1
+        if self.on_progress is not None and stats.expanded % self.progress_every == 0:
+            stats.elapsed = time.time() - self.start_time
+            self.on_progress(stats)
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def budget_exceeded(self, stored_nodes=0):
+        #record and report why the search has to stop early, if it does
+        if self.cancel_requested:
+            self.stop_reason = "cancelled"
+        elif self.time_limit is not None and time.time() - self.start_time > self.time_limit:
+            self.stop_reason = "time"
+        elif self.max_nodes is not None and stored_nodes > self.max_nodes:
+            self.stop_reason = "memory"
+        return self.stop_reason is not None
+
+    def total_time(self, node):
+        #moves so far plus the crane's trip back to the park position
+        last_r, last_c = node.crane_pos
+        park_r, park_c = self.geometry.park
+        return_dist = abs(last_r - park_r) + abs(last_c - park_c)
+        return node.g_cost + return_dist
+
+    def check_initial_state(self):
+        #shared by every strategy: report an unreachable band, and stop early if nothing needs to move
+        if not self.balance_target.achievable:
+            print(f"Balance within 10% is not achievable, minimizing imbalance to {self.balance_target.min_imbalance}.")
 
-    def run_a_star(self):
         if self.initial_state.is_balanced():
             print("Initial state is balanced.")
+            self.finish_search()
             self.solution_log(self.initial_state)
+            return True
+        return False
+
+    def report_solution(self, goal_node):
+        self.finish_search()
+        total_time = self.total_time(goal_node)
+        print("Found solution.")
+        print(f"Total Time: {total_time} minutes")
+        self.solution_log(goal_node, total_time)
+
+    def report_best(self, node):
+        #answer with node, the best plan found (or repaired), or report why there is none
+        if node is None:
+            self.report_failure()
             return
-            
-        open_list: List[Tuple[int,int,Node]] = [] #store list of tuples containing {Node.f_cost, Node idx, Node}
-        closed_set: Set[Tuple] = set()
-        
-        node_idx = 0
-        heapq.heappush(open_list, (self.initial_state.f_cost, node_idx, self.initial_state))
-        node_idx += 1
+        if self.stop_reason is not None:
+            print("Search stopped early, using the best plan found so far.")
+        self.report_solution(node)
+
+    def report_failure(self):
+        self.finish_search()
+        if self.stop_reason == "cancelled":
+            print("Search cancelled.")
+        elif self.stop_reason == "time":
+            print("Search stopped: time budget exhausted.")
+        elif self.stop_reason == "memory":
+            print("Search stopped: node budget exhausted.")
+        else:
+            print("Failed to find a solution.")
 
-        g_costs: Dict[Tuple,int] = {self.get_key(self.initial_state): self.initial_state.g_cost} #dict of {state key: f_cost}
+    def run_a_star(self, weight=1.0):
+        #weight > 1 is weighted A*: f = g + weight * h, at most weight times the optimal cost with an admissible h
+        self.start_search()
+        if self.check_initial_state():
+            return
+            
+        table = TranspositionTable() #best g_cost and closed flag per state key
+        proves_bound = weight == 1.0 and self.heuristic.admissible #popping f_cost >= incumbent cost means nothing cheaper is left
+        self.incumbent = self.warm_start_plan()
+        checkpoint = self.load_checkpoint(table)
+        if checkpoint is not None:
+            open_list = checkpoint.open_list
+            node_idx = checkpoint.node_idx
+            if checkpoint.incumbent is not None and (self.incumbent is None or checkpoint.incumbent.g_cost < self.incumbent.g_cost):
+                self.incumbent = checkpoint.incumbent
+            print(f"Resumed search from checkpoint with {len(open_list)} open nodes.")
+        else:
+            open_list: List[Tuple[float,int,Node]] = [] #store list of tuples containing {priority, Node idx, Node}
+            node_idx = 0
+            heapq.heappush(open_list, (self.initial_state.f_cost, node_idx, self.initial_state))
+            node_idx += 1
+            table.offer(self.initial_state.key, self.initial_state.g_cost)
 
+        stats = self.stats
+        timer = time.perf_counter
+        last_checkpoint = time.time()
         while open_list:
-            _, _, current_node = heapq.heappop(open_list)
-            current_node_key = self.get_key(current_node)
+            entry = heapq.heappop(open_list)
+            current_node = entry[2]
+            current_node_key = current_node.key
+
+            #skip closed states and stale heap entries superseded by a cheaper path
+            started = timer()
+            stale = table.is_closed(current_node_key) or current_node.g_cost > table.best_g(current_node_key)
+            stats.hashing_seconds += timer() - started
+            if stale:
+                continue
+
+            if current_node.ship is None: #restored from a checkpoint without its ship
+                current_node.ship = current_node.ship_state()
 
             if current_node.is_balanced():
-                print("Found solution.")
-                
-                last_r, last_c = current_node.crane_pos
-                park_r, park_c = (8, 0) 
-                
-                return_dist = abs(last_r - park_r) + abs(last_c - park_c)
-                total_time = current_node.g_cost + return_dist
-                
-                print(f"Total Time: {total_time} minutes")
-                
-                self.solution_log(current_node, total_time)
+                #the search ends here, with the incumbent if that is cheaper (a repaired plan can be)
+                if self.incumbent is not None and self.incumbent.g_cost < current_node.g_cost:
+                    current_node = self.incumbent
+                self.remove_checkpoint()
+                self.report_solution(current_node)
                 return
-            
-            if current_node_key in closed_set:
-                continue
+
+            if self.incumbent is not None and self.beyond_bound(current_node, proves_bound):
+                if proves_bound:
+                    break
+                continue #pushed before the incumbent got this cheap
+
+            if self.budget_exceeded(len(table)):
+                heapq.heappush(open_list, entry) #still to expand when the search resumes
+                self.save_checkpoint(open_list, table, node_idx)
+                break
 
             #at this point, node is not solution nor fully explored, and has lowest f_cost
-            for successor in current_node.get_successors():
-                successor_key = self.get_key(successor)
-                successor_current_cost = successor.g_cost #get_successor() must update each successor node's g_cost (and maybe h_cost) within the function!!
-                current_best_cost = g_costs.get(successor_key)
+            self.count_expansion()
+            self.best_f_cost = current_node.f_cost
 
-                if current_best_cost is not None and current_best_cost < successor_current_cost:
+            for successor in self.accepted_successors(current_node, table):
+                if self.incumbent is not None and self.beyond_bound(successor, proves_bound) and (proves_bound or not successor.is_balanced()):
                     continue
-                
-                #at this point, we found a successor that is better
-                g_costs[successor_key] = successor_current_cost
-
-                if successor_key in closed_set:
-                    closed_set.remove(successor_key)
-                
-                heapq.heappush(open_list, (successor.f_cost, node_idx, successor))
+                priority = successor.f_cost if weight == 1.0 else successor.g_cost + weight * successor.h_cost
+                heapq.heappush(open_list, (priority, node_idx, successor))
                 node_idx += 1
+                if successor.is_balanced() and (self.incumbent is None or successor.g_cost < self.incumbent.g_cost):
+                    self.incumbent = successor #best plan seen so far, kept in checkpoints
+
+            table.close(current_node_key)
+            current_node.release() #children hold their own ships; the path back is kept as moves
+            stats.reopened = table.reopened
+            stats.note_open_size(len(open_list))
 
-            closed_set.add(current_node_key)
+            if self.checkpoint_path and stats.expanded % CHECKPOINT_CHECK_EVERY == 0 and time.time() - last_checkpoint >= self.checkpoint_every:
+                self.save_checkpoint(open_list, table, node_idx)
+                last_checkpoint = time.time()
             
-        if not current_node.is_balanced():
-            print("Failed to find a solution.")
+        if self.stop_reason is None:
+            self.remove_checkpoint() #nothing cheaper than the incumbent is left, or the whole space was searched
+        self.report_best(self.incumbent)
+
+    def has_previous_plan(self):
+        return self.previous_manifest is not None and bool(self.previous_moves)
+
+    def warm_start_plan(self):
+        #the previous plan repaired for this manifest (see Repair.py), or None
+        self.repaired_plan = None
+        if not self.has_previous_plan():
+            return None
+        try:
+            self.repaired_plan = repair_plan(self.previous_manifest.grid, self.previous_moves, self.initial_state, self.heuristic)
+        except ValueError as e:
+            print(f"Previous plan ignored: {e}")
+            return None
+
+        if self.repaired_plan is None:
+            print("Previous plan could not be repaired, searching without a bound.")
+        else:
+            print(f"Repaired previous plan: {len(self.get_moves(self.repaired_plan))} moves with cost {self.repaired_plan.g_cost}.")
+        return self.repaired_plan
+
+    def beyond_bound(self, node, proves_bound):
+        #node can't lead to a plan cheaper than the incumbent. Searches that don't prove their plan optimal keep the
+        #nodes that can tie it, so they still end where they would without a bound; only an admissible h_cost counts
+        bound = node.g_cost + node.h_cost if self.heuristic.admissible else node.g_cost
+        return bound >= self.incumbent.g_cost if proves_bound else bound > self.incumbent.g_cost
+
+    def load_checkpoint(self, table):
+        if not self.checkpoint_path:
+            return None
+        checkpoint = SearchCheckpoint.load(self.checkpoint_path, self.cache_key(), self.initial_state, table)
+        if checkpoint is not None:
+            for name, value in checkpoint.counters.items():
+                setattr(self.stats, name, value)
+        return checkpoint
+
+    def save_checkpoint(self, open_list, table, node_idx):
+        if not self.checkpoint_path:
+            return
+        counters = {name: getattr(self.stats, name) for name in ("generated", "expanded", "deduplicated", "reopened", "max_open")}
+        try:
+            SearchCheckpoint(self.cache_key(), open_list, table, node_idx, self.incumbent, counters).save(self.checkpoint_path)
+        except OSError as e:
+            print(f"Error writing search checkpoint: {e}")
+
+    def remove_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError: #never written, or another solve of the same manifest finished first
+            pass
+
+    def accepted_successors(self, node, table):
+        #children of node that offer() accepted, best first (lowest f_cost, then h_cost) so they win f_cost ties
+        if self.expander is not None and self.pruning != "aggressive":
+            return self.vectorized_successors(node, table)
+
+        stats = self.stats
+        timer = time.perf_counter
+
+        started = timer()
+        heuristic_before = stats.heuristic_seconds
+        successors = node.get_successors(self.heuristic, self.pruning, ordered=True)
+        stats.successor_seconds += timer() - started - (stats.heuristic_seconds - heuristic_before)
+        stats.generated += len(successors)
+
+        accepted_successors = []
+        for successor in successors:
+            #get_successor() must update each successor node's g_cost (and maybe h_cost) within the function!!
+            #offer() only accepts a strictly cheaper path, and reopens the state if it was closed
+            started = timer()
+            accepted = table.offer(successor.key, successor.g_cost)
+            stats.hashing_seconds += timer() - started
+            if not accepted:
+                stats.deduplicated += 1
+                continue
+            accepted_successors.append(successor)
+        return accepted_successors
+
+    def vectorized_successors(self, node, table):
+        #same children as the get_successors path, but every move is costed, hashed and (for the built-in
+        #heuristics) estimated in one NumPy pass, and only the moves offer() accepts become Nodes.
+        #Sibling keys are distinct, so offering before sorting accepts exactly the same children
+        stats = self.stats
+        timer = time.perf_counter
+        started = timer()
+        r1s, c1s, r2s, c2s, g_costs, keys, h_costs = self.expander.candidates(node, self.pruning)
+        stats.successor_seconds += timer() - started
+        stats.generated += len(keys)
+
+        started = timer()
+        accepted = [i for i, (key, g_cost) in enumerate(zip(keys, g_costs)) if table.offer(key, g_cost)]
+        stats.hashing_seconds += timer() - started
+        stats.deduplicated += len(keys) - len(accepted)
+
+        started = timer()
+        heuristic_before = stats.heuristic_seconds
+        successors = [
+            self.expander.materialize(node, r1s[i], c1s[i], r2s[i], c2s[i], g_costs[i], None if h_costs is None else h_costs[i], self.heuristic)
+            for i in accepted
+        ]
+        sort_children(successors)
+        stats.successor_seconds += timer() - started - (stats.heuristic_seconds - heuristic_before)
+        return successors
+
+    def run_ida_star(self):
+        #iterative deepening A*: depth-first passes under a rising f_cost threshold.
+        #Memory is only the current path (plus one successor list per level), at the price of re-expanding nodes
+        self.start_search()
+        if self.check_initial_state():
+            return
+
+        self.incumbent = self.warm_start_plan()
+        threshold = self.initial_state.f_cost
+        while True:
+            if self.incumbent is not None and self.heuristic.admissible and threshold >= self.incumbent.g_cost:
+                self.report_solution(self.incumbent) #no plan under the threshold is cheaper than the repaired one
+                return
+            self.best_f_cost = threshold
+            next_threshold = None
+            path_keys = {self.initial_state.key}
+            stack = [(self.initial_state, iter(self.ordered_successors(self.initial_state)))]
+
+            while stack:
+                if self.budget_exceeded(len(stack)):
+                    self.report_best(self.incumbent)
+                    return
+
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    path_keys.discard(node.key)
+                    stack.pop()
+                    continue
+
+                if child.f_cost > threshold:
+                    if next_threshold is None or child.f_cost < next_threshold:
+                        next_threshold = child.f_cost
+                    continue
+
+                if child.key in path_keys: #no cycles along the current path
+                    self.stats.deduplicated += 1
+                    continue
+
+                if self.incumbent is not None and self.beyond_bound(child, self.heuristic.admissible):
+                    continue #can't lead to a plan cheaper than the repaired one
+
+                if child.is_balanced():
+                    #no dearer than the incumbent, or it would have been pruned just above
+                    self.report_solution(child)
+                    return
+
+                self.count_expansion()
+                path_keys.add(child.key)
+                stack.append((child, iter(self.ordered_successors(child))))
+                self.stats.note_open_size(len(stack))
+
+            if next_threshold is None:
+                self.report_best(self.incumbent)
+                return
+            threshold = next_threshold
+
+    def ordered_successors(self, node):
+        successors = node.get_successors(self.heuristic, self.pruning, ordered=True)
+        self.stats.generated += len(successors)
+        return successors
+
+    def run_beam_search(self):
+        #anytime beam search: breadth-first layers cut down to the beam_width best f_cost nodes.
+        #Every improving goal is streamed through on_solution; passes repeat with a doubled width until a pass
+        #finishes without cutting anything (no better plan exists under the heuristic) or the budget runs out
+        self.start_search()
+        if self.check_initial_state():
+            return
+
+        best_node = self.warm_start_plan()
+        if best_node is not None and self.on_solution:
+            self.on_solution(best_node, self.total_time(best_node))
+        width = self.beam_width
+        while True:
+            truncated = False
+            layer = [self.initial_state]
+            seen = {self.initial_state.key: self.initial_state.g_cost}
+
+            while layer and not self.budget_exceeded(len(seen)):
+                children = []
+                for node in layer:
+                    self.count_expansion()
+                    for child in node.get_successors(self.heuristic, self.pruning):
+                        self.stats.generated += 1
+                        if best_node is not None and child.f_cost >= best_node.g_cost:
+                            continue
+                        best_g = seen.get(child.key)
+                        if best_g is not None and best_g <= child.g_cost:
+                            self.stats.deduplicated += 1
+                            continue
+                        seen[child.key] = child.g_cost
+
+                        if child.is_balanced():
+                            if best_node is None or child.g_cost < best_node.g_cost:
+                                best_node = child
+                                if self.on_solution:
+                                    self.on_solution(child, self.total_time(child))
+                            continue
+                        children.append(child)
+                    node.release()
+
+                children.sort(key=lambda child: (child.f_cost, child.h_cost))
+                self.stats.note_open_size(len(children))
+                if children:
+                    self.best_f_cost = children[0].f_cost
+                if len(children) > width:
+                    truncated = True
+                    children = children[:width]
+                layer = children
+
+            if self.stop_reason is not None or not truncated:
+                break
+            width *= 2
+
+        self.report_best(best_node)
+
+    def run_portfolio(self):
+        self.start_search()
+        if self.check_initial_state():
+            return
+
+        def improved(plan):
+            if self.on_solution:
+                self.on_solution(self.replay(plan["moves"]), plan["total_time"])
+
+        options = {
+            "pruning": self.pruning, "max_nodes": self.max_nodes, "vectorized": self.vectorized,
+            "previous_manifest": self.previous_manifest, "previous_moves": self.previous_moves,
+        }
+        race = Portfolio(
+            self.manifest, self.portfolio, options, time_limit=self.time_limit, workers=self.portfolio_workers,
+            on_plan=improved, on_progress=self.on_progress, should_stop=lambda: self.cancel_requested, stats=self.stats
+        )
+        best = race.run()
+        self.best_f_cost = race.lower_bound
+        if best is not None and best["optimal"]:
+            self.stop_reason = None #the race was cut short because nothing better exists
+        else:
+            self.stop_reason = race.stop_reason
+
+        if best is None:
+            self.report_failure()
+            return
+        print(f"Best plan from {best['label']}{' (optimal)' if best['optimal'] else ''}.")
+        self.report_solution(self.replay(best["moves"]))
 
     def get_key(self, node):
-        key_list = []
-        for slot in node.used_slots:
-            key_list.append((slot.weight, slot.row, slot.col))
-        
-        return tuple(sorted(key_list))
+        #canonical state key, computed incrementally when the node is built
+        return node.key
+
+    def get_moves(self, goalNode):
+        #((from_r, from_c), (to_r, to_c)) for every move from the initial state to goalNode
+        moves = []
+        current_node = goalNode
+        while current_node:
+            if current_node.prev_state:
+                moves.append(current_node.prev_state)
+            current_node = current_node.parent
+        moves.reverse()
+        return moves
 
-    def solution_log(self, goalNode, total_time):
+    def solution_log(self, goalNode, total_time=0):
         solution: List[Node] = []
         current_node = goalNode
         
@@ -136,4 +626,5 @@ class Problem:
         print(f"Total cost: {goalNode.g_cost}")
         print()
 
+        self.final_node = goalNode
         self.final_time_minutes = total_time
@@ -0,0 +1,99 @@
+from typing import Dict, List, Tuple
+
+FINISH_MOVES = 8 #greedy moves tried after a replayed plan that no longer balances the edited ship
+MIN_MATCHED_SHARE = 0.8 #containers the two manifests must share for the edited one to count as a correction
+
+def count_containers(grid):
+    return sum(1 for row in grid for slot in row if slot.description not in ("NAN", "UNUSED"))
+
+def plan_containers(previous_grid, moves):
+    #the old plan as (container, target column) pairs; a container is named by its cell in the previous manifest
+    occupant = {}
+    for r, row in enumerate(previous_grid):
+        for c, slot in enumerate(row):
+            if slot.description not in ("NAN", "UNUSED"):
+                occupant[(r, c)] = (r, c)
+
+    plan = []
+    for (r1, c1), (r2, c2) in moves:
+        container = occupant.pop((r1, c1), None)
+        if container is None:
+            raise ValueError(f"Previous plan moves [{r1+1},{c1+1}], which is empty in the previous manifest")
+        occupant[(r2, c2)] = container
+        plan.append((container, c2))
+    return plan
+
+def match_containers(previous_grid, grid):
+    #previous cell -> cell in the edited manifest, for containers still on board.
+    #Same cell and description first (a weight fix), then a description that is unique in both manifests
+    def cells_by_description(g):
+        cells: Dict[str, List[Tuple[int, int]]] = {}
+        for r, row in enumerate(g):
+            for c, slot in enumerate(row):
+                if slot.description not in ("NAN", "UNUSED"):
+                    cells.setdefault(slot.description, []).append((r, c))
+        return cells
+
+    previous_cells = cells_by_description(previous_grid)
+    cells = cells_by_description(grid)
+    matches = {}
+    for description, previous in previous_cells.items():
+        current = cells.get(description, [])
+        for r, c in previous:
+            if r < len(grid) and c < len(grid[r]) and grid[r][c].description == description:
+                matches[(r, c)] = (r, c)
+            elif len(previous) == 1 and len(current) == 1:
+                matches[(r, c)] = current[0]
+    return matches
+
+def manifests_match(previous_grid, grid, matches=None, min_share=MIN_MATCHED_SHARE):
+    #grid is a correction of previous_grid rather than another ship: most containers of both are matched.
+    #One added, removed or renamed container always passes, so small manifests can be corrected too
+    if matches is None:
+        matches = match_containers(previous_grid, grid)
+    total = max(count_containers(previous_grid), count_containers(grid))
+    return total - len(matches) <= max(1, total * (1 - min_share))
+
+def repair_plan(previous_grid, moves, initial_node, heuristic=None, finish_moves=FINISH_MOVES):
+    #the previous plan carried over to the edited manifest whose initial state is initial_node, or None.
+    #Moves follow their containers: each goes to the lowest open slot of its old target column, and moves of
+    #containers that are gone, buried under a new one or headed for a full column are dropped. The plan stops at
+    #its first balanced state; if it never gets there, up to finish_moves greedy moves are tried from its end.
+    #Raises ValueError when the manifests share too few containers (see manifests_match)
+    plan = plan_containers(previous_grid, moves)
+    positions = match_containers(previous_grid, initial_node.state)
+    if not manifests_match(previous_grid, initial_node.state, positions):
+        raise ValueError(f"Previous manifest is for another ship, only {len(positions)} of its containers match")
+
+    geometry = initial_node.ship.table.geometry
+    node = initial_node
+    for container, c2 in plan:
+        position = positions.get(container)
+        if position is None:
+            continue
+        r1, c1 = position
+        if c2 >= geometry.cols: #the previous manifest was for a wider bay
+            continue
+        ship = node.ship
+        r2 = ship.profiles[c2][1]
+        if c1 == c2 or ship.profiles[c1][0] != r1 or r2 == geometry.rows:
+            continue
+
+        node = node.apply_move(((r1, c1), (r2, c2)), heuristic)
+        positions[container] = (r2, c2)
+        if node.is_balanced():
+            return node
+
+    return finish_plan(node, heuristic, finish_moves)
+
+def finish_plan(node, heuristic, finish_moves):
+    #follow the most promising successor (lowest f_cost, then h_cost) until the ship balances
+    seen = {node.key}
+    for _ in range(finish_moves):
+        if node.is_balanced():
+            return node
+        node = next((child for child in node.get_successors(heuristic, ordered=True) if child.key not in seen), None)
+        if node is None:
+            return None
+        seen.add(node.key)
+    return node if node.is_balanced() else None
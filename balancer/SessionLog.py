@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
+
+class SessionLog:
+    # SESSION LOG CLASS
+    # -------------
+    # The operator's log for one shift: append-only on disk, bounded in memory, readable incrementally.
+    # Functionality:
+    #   write() numbers every entry; entries_since(cursor) returns only what came after a cursor the client holds
+    #   Only the newest `retain` entries stay in memory; the file keeps everything
+    #   Entries reach the file at most flush_interval seconds after they are written, so a crash loses
+    #   at most that much of the shift. flush() forces it, e.g. at shutdown
+    #   Safe to write from request threads and background jobs at once
+
+    filepath: Optional[str]
+    entries: Deque[Tuple[int, str]]
+
+    def __init__(self, filepath=None, retain=2000, flush_interval=5.0):
+        self.filepath = filepath
+        self.flush_interval = flush_interval
+        self.entries = deque(maxlen=retain)
+        self.count = 0 #entries ever written, also the cursor of the next one
+        self.pending: List[str] = []
+        self.last_flush = time.time()
+        self.flush_timer = None
+        self.flush_error = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def write(self, entry):
+        with self.lock:
+            self.entries.append((self.count, entry))
+            self.count += 1
+            self.pending.append(entry)
+            due = time.time() - self.last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+        else:
+            self.schedule_flush()
+        return entry
+
+    def schedule_flush(self):
+        #make sure a quiet spell after this entry still gets it to disk
+        with self.lock:
+            if self.flush_timer is not None or not self.filepath:
+                return
+            self.flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            self.last_flush = time.time()
+            if not self.filepath: #memory only
+                self.pending = []
+                return True
+            if not self.pending:
+                return True
+
+            lines = "".join(f"{entry}\n" for entry in self.pending)
+            try:
+                with open(self.filepath, "a") as f:
+                    f.write(lines)
+            except OSError as e:
+                if self.flush_error is None: #report once, keep the entries for the next try
+                    print(f"[ERROR] Could not write session log: {e}")
+                self.pending = self.pending[-self.entries.maxlen:] #still bounded if the disk never comes back
+                self.flush_error = e
+                return False
+
+            self.pending = []
+            self.flush_error = None
+            return True
+
+    def entries_since(self, cursor=0):
+        #(entries after cursor, cursor to send next time, whether older entries than retained were asked for)
+        with self.lock:
+            oldest = self.entries[0][0] if self.entries else self.count
+            start = min(max(cursor - oldest, 0), len(self.entries))
+            new_entries = [entry for _, entry in islice(self.entries, start, None)]
+            return new_entries, self.count, cursor < oldest
+
@@ -0,0 +1,97 @@
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .Cache import SolutionCache
+from .SessionLog import SessionLog
+
+OPERATOR_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+class OperatorSession:
+    # OPERATOR SESSION CLASS
+    # -------------
+    # What the app remembers about one operator (one browser) between requests.
+    # Functionality:
+    #   log is this operator's own SessionLog (see SessionLog.py): their manifests, plans and comments only,
+    #   so operators working at once never see each other's entries
+    #   recent_plans maps a manifest filename to the (ParsedManifest, moves) this operator last solved for it, so
+    #   their corrected re-upload warm-starts from their own plan, never from another operator's same-named file
+    #   Background solves are tagged with the operator id (see Jobs.py), so only their owner can poll or cancel them
+    #   Safe to use from several requests of the same operator at once
+
+    id: str
+    log: SessionLog
+    recent_plans: SolutionCache
+
+    def __init__(self, operator_id, log_path=None, plans=16):
+        self.id = operator_id
+        self.log = SessionLog(log_path)
+        self.recent_plans = SolutionCache(capacity=plans)
+        self.last_seen = time.time()
+
+    def previous_plan(self, filename):
+        return self.recent_plans.get(filename) if filename else None
+
+    def remember_plan(self, filename, manifest, moves):
+        if filename:
+            self.recent_plans.put(filename, (manifest, moves))
+
+class OperatorSessions:
+    # OPERATOR SESSIONS CLASS
+    # -------------
+    # Every operator's OperatorSession by the random id app.py keeps in a cookie.
+    # Functionality:
+    #   get(operator_id) returns the session for a well-formed id (recreated empty after a restart) or starts
+    #   one with a fresh id for a missing or malformed one; the second value says whether the id is new
+    #   log_path(operator_id) names the file of a new session's log, None keeps logs in memory only
+    #   Sessions idle for idle_seconds are dropped, and at most capacity are kept (the least recently seen go first);
+    #   their logs are flushed to disk first
+    #   Safe to share between request threads
+
+    sessions: Dict[str, OperatorSession]
+
+    def __init__(self, log_path: Optional[Callable[[str], str]] = None, capacity=256, idle_seconds=12 * 3600):
+        self.log_path = log_path
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, operator_id: Optional[str]) -> Tuple[OperatorSession, bool]:
+        created = operator_id is None or OPERATOR_ID_PATTERN.fullmatch(operator_id) is None
+        if created:
+            operator_id = secrets.token_hex(16)
+
+        now = time.time()
+        with self.lock:
+            session = self.sessions.get(operator_id)
+            if session is None:
+                session = OperatorSession(operator_id, self.log_path(operator_id) if self.log_path else None)
+                self.sessions[operator_id] = session
+            self.sessions.move_to_end(operator_id)
+            session.last_seen = now
+            forgotten = self.forget_idle(now)
+        for old in forgotten: #file writes stay outside the lock
+            old.log.flush()
+        return session, created
+
+    def forget_idle(self, now):
+        #oldest first, so stop at the first session still in use
+        forgotten = []
+        while self.sessions:
+            operator_id, session = next(iter(self.sessions.items()))
+            if len(self.sessions) <= self.capacity and now - session.last_seen < self.idle_seconds:
+                break
+            forgotten.append(self.sessions.pop(operator_id))
+        return forgotten
+
+    def all(self):
+        with self.lock:
+            return list(self.sessions.values())
+
+    def __len__(self):
+        with self.lock:
+            return len(self.sessions)
@@ -0,0 +1,80 @@
+import time
+
+from .Heuristic import Heuristic
+
+class SearchStats:
+    # SEARCH STATS CLASS
+    # -------------
+    # Counters and timings of one search, kept on Problem.stats and reset by every solve.
+    # Functionality:
+    #   generated    - successor nodes built
+    #   expanded     - nodes whose successors were generated
+    #   deduplicated - successors dropped because their state was already reached at least as cheaply
+    #   reopened     - closed states reached again by a strictly cheaper path
+    #   max_open     - largest frontier held at once (open list, IDA* stack or beam layer)
+    #   successor/heuristic/hashing_seconds split the A* loop time between building successors,
+    #   estimating their h_cost, and transposition table lookups
+    #   Safe to read from another thread while the search runs
+
+    generated: int
+    expanded: int
+    deduplicated: int
+    reopened: int
+    max_open: int
+
+    def __init__(self):
+        self.generated = 0
+        self.expanded = 0
+        self.deduplicated = 0
+        self.reopened = 0
+        self.max_open = 0
+        self.successor_seconds = 0.0
+        self.heuristic_seconds = 0.0
+        self.hashing_seconds = 0.0
+        self.elapsed = 0.0
+
+    def note_open_size(self, size):
+        if size > self.max_open:
+            self.max_open = size
+
+    def to_json(self):
+        return {
+            "generated": self.generated,
+            "expanded": self.expanded,
+            "deduplicated": self.deduplicated,
+            "reopened": self.reopened,
+            "max_open": self.max_open,
+            "successor_seconds": round(self.successor_seconds, 4),
+            "heuristic_seconds": round(self.heuristic_seconds, 4),
+            "hashing_seconds": round(self.hashing_seconds, 4),
+            "elapsed": round(self.elapsed, 4),
+        }
+
+    def summary(self):
+        #one line for the session log
+        return (
+            f"Search stats: {self.expanded} expanded, {self.generated} generated, {self.deduplicated} deduplicated, "
+            f"{self.reopened} reopened, open list peak {self.max_open}; "
+            f"{self.elapsed:.3f}s total, {self.successor_seconds:.3f}s successors, "
+            f"{self.heuristic_seconds:.3f}s heuristic, {self.hashing_seconds:.3f}s hashing."
+        )
+
+class TimedHeuristic(Heuristic):
+    # TIMED HEURISTIC CLASS
+    # -------------
+    # Wraps the configured heuristic so the time spent in estimate() lands in SearchStats.heuristic_seconds.
+
+    def __init__(self, heuristic, stats):
+        self.heuristic = heuristic
+        self.stats = stats
+        self.name = heuristic.name
+        self.admissible = heuristic.admissible
+
+    def prepare(self, ship):
+        self.heuristic.prepare(ship)
+
+    def estimate(self, node):
+        start = time.perf_counter()
+        h = self.heuristic.estimate(node)
+        self.stats.heuristic_seconds += time.perf_counter() - start
+        return h
@@ -0,0 +1,47 @@
+from typing import Dict, Optional
+
+class TranspositionTable:
+    # TRANSPOSITION TABLE CLASS
+    # -------------
+    # Best known g_cost and open/closed status for every state key the search has seen.
+    # Functionality:
+    #   Replaces the separate g_costs dict and closed_set of run_a_star with a single dict
+    #   Entries are packed as g_cost * 2 + closed flag to keep one int per state
+    #   reopened counts closed states that were reached again by a cheaper path
+
+    entries: Dict[int, int]
+
+    def __init__(self):
+        self.entries = {}
+        self.reopened = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def best_g(self, key) -> Optional[int]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry >> 1
+
+    def is_closed(self, key):
+        return self.entries.get(key, 0) & 1 == 1
+
+    def offer(self, key, g_cost):
+        #record a path to key; True if it is the first or a strictly cheaper one (which also reopens the state)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry >> 1 <= g_cost:
+                return False
+            self.reopened += entry & 1
+
+        self.entries[key] = g_cost << 1
+        return True
+
+    def close(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries[key] = entry | 1
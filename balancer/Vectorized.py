@@ -0,0 +1,201 @@
+from typing import List
+
+from .Node import Node
+from .Heuristic import Heuristic, GreedyHeuristic, PartitionHeuristic
+
+try:
+    import numpy as np
+except ImportError: #optional, only Problem(vectorized=True) needs it
+    np = None
+
+HAVE_NUMPY = np is not None
+
+class SuccessorExpander:
+    # SUCCESSOR EXPANDER CLASS
+    # -------------
+    # NumPy version of Node.get_successors for A*: every candidate move of a node evaluated as arrays at once.
+    # Functionality:
+    #   candidates() returns the moves in get_successors order with their g_cost, state key and h_cost,
+    #   without building any ShipState or Node, so A* can drop duplicates against its TranspositionTable first
+    #   materialize() builds the Node for one surviving move, with the h_cost already computed
+    #   Costs use the same clearance rule as Node.adjusted_manhattan_distance, written as
+    #   2 * max(from row, gap peak + 1, to row) - from row - to row + column distance
+    #   The zero, greedy and partition heuristics are computed for the whole batch from the children's side
+    #   weights and balance flags; any other heuristic is estimated per materialized Node as usual
+    #   Supports the "off" and "exact" pruning modes; Problem uses get_successors for "aggressive"
+    #   Column arrays are built once per manifest for its Geometry (see Geometry.py)
+
+    def __init__(self, table, heuristic):
+        if np is None:
+            raise ValueError("Vectorized successors need NumPy installed")
+        self.table = table
+        self.heuristic = heuristic
+        geometry = table.geometry
+        self.rows = geometry.rows
+        self.cols = geometry.cols
+        self.keel = geometry.keel
+
+        self.columns = np.arange(self.cols)
+        self.pair_sources, self.pair_targets = (np.array(side) for side in zip(*[(c1, c2) for c1 in range(self.cols) for c2 in range(self.cols) if c1 != c2]))
+        self.after = self.columns[None, :] > self.columns[:, None] #after[a, b]: column b is past column a
+        self.places_per_col = self.rows + 1 #more than the rows of a column, so a column's places never run into the next one
+        self.places = self.places_per_col * self.cols
+        self.zobrist = np.array(table.zobrist, dtype=np.uint64)
+        self.crane_keys = np.array(table.crane_keys, dtype=np.uint64)
+        self.weights = np.array(table.weights, dtype=np.int64)
+        self.heaviest = max(table.weights, default=0)
+        self.sort_last = (self.heaviest + 1) * self.places #greedy sort key of containers off the heavy side
+        if type(heuristic) is PartitionHeuristic:
+            self.doubled_prefix = np.array(heuristic.doubled_prefix, dtype=np.int64)
+
+        #keel distance of every column, and the columns of each side nearest the keel first (partition).
+        #The shorter side is padded with an extra always-empty column (index cols) so both sides have one shape
+        side = max(self.keel, self.cols - self.keel)
+        padding = [self.cols] * side
+        self.distances = np.array([geometry.keel_distance(c) for c in range(self.cols)] + [0], dtype=np.int64)
+        self.port_cols = np.array((list(range(self.keel - 1, -1, -1)) + padding)[:side])
+        self.starboard_cols = np.array((list(range(self.keel, self.cols)) + padding)[:side])
+
+    def candidates(self, node, pruning="exact"):
+        #(r1, c1, r2, c2, g_cost, key, h_cost) lists for every legal move, container-major like get_successors.
+        #h_cost is None when the heuristic has no batch form
+        ship = node.ship
+        columns = np.array([(top, free, peak, codes[-1] if codes else 0) for top, free, peak, codes in ship.profiles], dtype=np.int64)
+        tops, frees, peaks = columns[:, 0], columns[:, 1], columns[:, 2]
+
+        #every (source, target) column pair, source-major, that has a container to lift and room to drop it
+        c1, c2 = self.pair_sources, self.pair_targets
+        keep = (tops[c1] >= 0) & (frees[c2] < self.rows)
+        if pruning != "off" and node.prev_state is not None:
+            (from_r, from_c), (to_r, to_c) = node.prev_state
+            keep &= ~((c1 == to_c) & (tops[c1] == to_r) & (c2 == from_c) & (frees[c2] == from_r))
+        c1, c2 = c1[keep], c2[keep]
+        r1, r2 = tops[c1], frees[c2]
+        codes = columns[c1, 3]
+
+        #running[a, b] = highest peak in columns a+1..b (-1 for b <= a), so the peak strictly between a < b
+        #is running[a, b - 1], the same numbers as ShipState.gap_peaks
+        running = np.maximum.accumulate(np.where(self.after, peaks, -1), axis=1)
+        crane_r, crane_c = node.crane_pos
+        travel = 2 * np.maximum(np.maximum(crane_r, self.peak_between(running, crane_c, c1) + 1), r1) - crane_r - r1 + np.abs(c1 - crane_c)
+        carry = 2 * np.maximum(np.maximum(r1, self.peak_between(running, c1, c2) + 1), r2) - r1 - r2 + np.abs(c2 - c1)
+        g_costs = node.g_cost + travel + carry
+
+        targets = r2 * self.cols + c2
+        keys = (np.uint64(ship.zobrist) ^ self.zobrist[codes, r1 * self.cols + c1]
+                ^ self.zobrist[codes, targets] ^ self.crane_keys[targets])
+
+        h_costs = self.estimates(ship, c1, c2, codes)
+        if h_costs is not None:
+            h_costs = h_costs.tolist()
+        return r1.tolist(), c1.tolist(), r2.tolist(), c2.tolist(), g_costs.tolist(), keys.tolist(), h_costs
+
+    def peak_between(self, running, a, b):
+        low = np.minimum(a, b)
+        return running[low, np.maximum(np.maximum(a, b) - 1, low)]
+
+    def side_weights(self, ship, c1, c2, codes):
+        #port weight, starboard weight and port count of every child, as ShipState.move updates them
+        moved = self.weights[codes]
+        from_port = c1 < self.keel
+        crossing = from_port != (c2 < self.keel)
+        shift = np.where(crossing, np.where(from_port, -moved, moved), 0)
+        count_shift = np.where(crossing, np.where(from_port, -1, 1), 0)
+        return ship.port_weight + shift, ship.starboard_weight - shift, ship.port_count + count_shift
+
+    def balanced(self, ship, port, starboard, port_count):
+        #Node.is_balanced for every child
+        used = ship.port_count + ship.starboard_count
+        if used <= 1:
+            return np.ones(len(port), dtype=bool)
+
+        target = self.table.target
+        imbalance = np.abs(port - starboard)
+        if target is not None and not target.achievable:
+            flags = imbalance <= target.min_imbalance
+        else:
+            flags = imbalance < (port + starboard) * 0.10
+        if used == 2:
+            flags |= port_count == 1
+        return flags
+
+    def estimates(self, ship, c1, c2, codes):
+        heuristic = self.heuristic
+        if type(heuristic) is Heuristic:
+            return np.zeros(len(codes), dtype=np.int64)
+        if type(heuristic) is GreedyHeuristic:
+            return self.greedy_estimates(ship, c1, c2, codes)
+        if type(heuristic) is PartitionHeuristic:
+            return self.partition_estimates(ship, c1, c2, codes)
+        return None
+
+    def greedy_estimates(self, ship, c1, c2, codes):
+        #Node.calculate_h_cost for every child: the heavy side's containers heaviest first, ties in column then
+        #row order like its stable sort, summing keel distances until the deficit is covered
+        port, starboard, _ = self.side_weights(ship, c1, c2, codes)
+        deficit = np.abs(port - starboard)
+
+        #one int per container and child: weight (negated, heaviest first), then column, then height in the column
+        stacks = [profile[3] for profile in ship.profiles]
+        counts = np.array([len(stack) for stack in stacks], dtype=np.int64)
+        weights = self.weights[[code for stack in stacks for code in stack]]
+        cols = np.repeat(self.columns, counts)
+        places = cols * self.places_per_col + np.arange(len(cols)) - np.repeat(np.cumsum(counts) - counts, counts)
+        places = np.tile(places, (len(codes), 1))
+        cols = np.tile(cols, (len(codes), 1))
+
+        #each child has one container somewhere new: from the top of c1 to the top of c2
+        children = np.arange(len(codes))
+        moved = np.cumsum(counts)[c1] - 1
+        places[children, moved] = c2 * self.places_per_col + self.places_per_col - 1
+        cols[children, moved] = c2
+
+        heavy = np.where((port > starboard)[:, None], cols < self.keel, cols >= self.keel)
+        order = np.sort(np.where(heavy, (self.heaviest - weights) * self.places + places, self.sort_last), axis=1)
+        on_heavy = order < self.sort_last
+        sorted_weights = np.where(on_heavy, self.heaviest - order // self.places, 0)
+        sorted_distances = np.where(on_heavy, self.distances[order % self.places // self.places_per_col], 0)
+
+        #a container counts while the deficit left before it is still positive
+        covered_before = np.cumsum(sorted_weights, axis=1) - sorted_weights
+        counted = deficit[:, None] - covered_before > 0
+        h = (sorted_distances * counted).sum(axis=1)
+        return np.where(deficit == 0, 0, h)
+
+    def partition_estimates(self, ship, c1, c2, codes):
+        #PartitionHeuristic.estimate for every child
+        port, starboard, port_count = self.side_weights(ship, c1, c2, codes)
+        target = self.table.target
+        if target is not None and not target.achievable:
+            needed = np.abs(port - starboard) - target.min_imbalance - 1
+        else:
+            needed = np.abs(port - starboard) - (port + starboard) * 0.10
+
+        prefix = self.doubled_prefix
+        k = np.minimum(np.searchsorted(prefix, needed, side="right"), len(prefix) - 1)
+
+        #container count per column of every child (plus the empty padding column), then the k nearest the keel on its heavy side
+        counts = np.tile(np.array([len(profile[3]) for profile in ship.profiles] + [0], dtype=np.int64), (len(codes), 1))
+        children = np.arange(len(codes))
+        counts[children, c1] -= 1
+        counts[children, c2] += 1
+
+        port_heavy = port > starboard
+        heavy_cols = np.where(port_heavy[:, None], self.port_cols, self.starboard_cols)
+        heavy_counts = np.take_along_axis(counts, heavy_cols, axis=1)
+        taken_before = np.cumsum(heavy_counts, axis=1) - heavy_counts
+        take = np.clip(k[:, None] - taken_before, 0, heavy_counts)
+        h = (take * self.distances[heavy_cols]).sum(axis=1)
+
+        crane_on_heavy = (c2 < self.keel) == port_heavy #the crane ends at the drop column
+        h += np.where(crane_on_heavy, k - 1, k)
+        h = np.where(k == 0, 1, h)
+        return np.where(self.balanced(ship, port, starboard, port_count), 0, h)
+
+    def materialize(self, node, r1, c1, r2, c2, g_cost, h_cost, heuristic):
+        return node.make_child(r1, c1, r2, c2, g_cost - node.g_cost, heuristic, h_cost)
+
+def sort_children(children: List[Node]):
+    #same order as get_successors(ordered=True)
+    children.sort(key=lambda child: (child.f_cost, child.h_cost))
+    return children
@@ -0,0 +1,119 @@
+import argparse
+import concurrent.futures
+import contextlib
+import csv
+import io
+import os
+import time
+
+from balancer.Problem import Problem
+from balancer.Heuristic import HEURISTICS
+from balancer.Node import PRUNING_MODES
+from balancer.Manifest import format_outbound_manifest, outbound_filename, parse_manifest
+
+SUMMARY_FIELDS = ["manifest", "status", "moves", "minutes", "nodes_expanded", "wall_time", "outbound"]
+NO_PLAN_STATUS = {"time": "timeout", "memory": "node_limit"} #--timeout or --max-nodes ran out before any plan, by stop_reason
+
+def solve_manifest(path, out_dir, search_options):
+    #runs in a worker process; the per-manifest timeout is the solver's own time_limit
+    name = os.path.basename(path)
+    row = {"manifest": name, "status": "error", "moves": "", "minutes": "", "nodes_expanded": "", "wall_time": "", "outbound": ""}
+    start_time = time.time()
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = parse_manifest(f)
+
+        solver = Problem(manifest, **search_options)
+        with contextlib.redirect_stdout(io.StringIO()): #solvers print every move
+            solver.solve()
+    except Exception as e:
+        row["status"] = f"error: {e}"
+        row["wall_time"] = round(time.time() - start_time, 3)
+        return row
+
+    row["wall_time"] = round(time.time() - start_time, 3)
+    row["nodes_expanded"] = solver.stats.expanded
+
+    if solver.final_node is None:
+        row["status"] = NO_PLAN_STATUS.get(solver.stop_reason, "failed")
+        return row
+
+    if solver.final_node is solver.initial_state:
+        row["status"] = "balanced"
+    elif solver.stop_reason is None:
+        row["status"] = "solved"
+    else:
+        #a balanced plan, but the best found before the budget (or a cancel) stopped the search, not the finished one
+        row["status"] = "budget" if solver.stop_reason in ("time", "memory") else "partial"
+    row["moves"] = len(solver.get_moves(solver.final_node))
+    row["minutes"] = solver.final_time_minutes
+
+    out_name = outbound_filename(name)
+    with open(os.path.join(out_dir, out_name), "w") as f:
+        f.write(format_outbound_manifest(solver.final_node.state))
+    row["outbound"] = out_name
+    return row
+
+def find_manifests(manifest_dir):
+    return sorted(
+        os.path.join(manifest_dir, name) for name in os.listdir(manifest_dir)
+        if name.endswith(".txt") and not name.endswith("OUTBOUND.txt")
+    )
+
+def run_batch(paths, out_dir, workers, search_options):
+    os.makedirs(out_dir, exist_ok=True)
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(solve_manifest, path, out_dir, search_options) for path in paths]
+        for future in concurrent.futures.as_completed(futures):
+            row = future.result()
+            print_row(row)
+            rows.append(row)
+
+    rows.sort(key=lambda row: row["manifest"])
+    return rows
+
+def write_summary(rows, out_dir):
+    filepath = os.path.join(out_dir, "batch_summary.csv")
+    with open(filepath, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return filepath
+
+def print_row(row):
+    print(f"{row['manifest']:<22} {row['status']:<10} {row['moves']:>6} {row['minutes']:>8} {row['nodes_expanded']:>10} {row['wall_time']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Balance every manifest in a directory in parallel.")
+    parser.add_argument("manifest_dir", nargs="?", default="manifests")
+    parser.add_argument("--out", default="outbound", help="directory for *OUTBOUND.txt files and batch_summary.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per manifest")
+    parser.add_argument("--strategy", default="astar", choices=Problem.STRATEGIES)
+    parser.add_argument("--heuristic", default="greedy", choices=sorted(HEURISTICS))
+    parser.add_argument("--max-nodes", type=int, default=None, help="stored node budget per manifest")
+    parser.add_argument("--pruning", default="exact", choices=PRUNING_MODES, help="successor pruning, see balancer/Node.py")
+    args = parser.parse_args()
+
+    search_options = {
+        "strategy": args.strategy,
+        "heuristic": args.heuristic,
+        "time_limit": args.timeout,
+        "max_nodes": args.max_nodes,
+        "pruning": args.pruning,
+    }
+
+    start_time = time.time()
+    print(f"{'manifest':<22} {'status':<10} {'moves':>6} {'minutes':>8} {'expanded':>10} {'seconds':>9}")
+    rows = run_batch(find_manifests(args.manifest_dir), args.out, args.workers, search_options)
+    summary_path = write_summary(rows, args.out)
+
+    solved = sum(1 for row in rows if row["status"] in ("solved", "balanced"))
+    cut_short = sum(1 for row in rows if row["status"] in ("budget", "partial"))
+    print(f"\n{solved}/{len(rows)} manifests balanced, {cut_short} more with the best plan found before the budget ran out, "
+          f"in {time.time() - start_time:.2f}s, summary written to {summary_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from balancer.Problem import Problem
+from balancer.Heuristic import HEURISTICS
+from balancer.Node import Slot, PRUNING_MODES
+from balancer.Geometry import DEFAULT_GEOMETRY, parse_geometry
+from balancer.Manifest import format_outbound_manifest, parse_manifest, MAX_WEIGHT
+
+try:
+    import resource
+except ImportError: #not available on Windows, peak RSS is left out there
+    resource = None
+
+MANIFEST_DIR = "manifests"
+MIN_SECONDS_DELTA = 0.05 #timing changes below this are noise, never regressions
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss #kilobytes on Linux
+
+def solve_case(name, manifest_text, geometry, heuristic, pruning, vectorized, trace_memory, results):
+    start_rss = peak_rss_kb()
+    if trace_memory:
+        tracemalloc.start()
+
+    start_time = time.time()
+    try:
+        solver = Problem(manifest_text, heuristic=heuristic, pruning=pruning, vectorized=vectorized, geometry=geometry)
+        with contextlib.redirect_stdout(io.StringIO()): #run_a_star prints every move
+            solver.run_a_star()
+    except Exception as e:
+        results.put({"status": f"error: {e}"})
+        return
+    seconds = time.time() - start_time
+
+    row = {
+        "status": "ok",
+        "seconds": round(seconds, 4),
+        "expanded": solver.stats.expanded,
+        "generated": solver.stats.generated,
+        "deduplicated": solver.stats.deduplicated,
+        "reopened": solver.stats.reopened,
+        "max_open": solver.stats.max_open,
+        "successor_seconds": round(solver.stats.successor_seconds, 4),
+        "heuristic_seconds": round(solver.stats.heuristic_seconds, 4),
+        "hashing_seconds": round(solver.stats.hashing_seconds, 4),
+        "moves": None,
+        "cost": None,
+        "minutes": None,
+        "peak_rss_kb": None,
+        "peak_alloc_kb": None,
+    }
+    if solver.final_node is not None:
+        row["moves"] = len(solver.get_moves(solver.final_node))
+        row["cost"] = solver.final_node.g_cost
+        row["minutes"] = solver.final_time_minutes
+    if start_rss is not None:
+        row["peak_rss_kb"] = peak_rss_kb() - start_rss #growth over what the process held before the solve
+    if trace_memory:
+        row["peak_alloc_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    results.put(row)
+
+def run_benchmark(cases, heuristics, timeout, pruning="exact", vectorized=False, trace_memory=False):
+    #every solve runs in its own process so a runaway search can be killed at the timeout,
+    #and so peak memory is measured per solve
+    rows = []
+    for name, manifest_text, geometry in cases:
+        for heuristic in heuristics:
+            results = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=solve_case, args=(name, manifest_text, geometry, heuristic, pruning, vectorized, trace_memory, results))
+            worker.start()
+            worker.join(timeout)
+
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+                row = {"status": "timeout"}
+            elif results.empty():
+                row = {"status": "error"}
+            else:
+                row = results.get()
+
+            row["manifest"] = name
+            row["bay"] = str(geometry)
+            row["heuristic"] = heuristic
+            rows.append(row)
+            print_row(row)
+    return rows
+
+#weight fixes --warm-start makes to the heaviest container: a 1 kg slip, and a weight entered three times too high
+CORRECTIONS = ("+1kg", "/3")
+
+def corrected_manifest(manifest_text, geometry, correction="+1kg"):
+    #the manifest with its heaviest container's weight fixed as in CORRECTIONS ("+1kg" is lighter at the limit)
+    grid = [list(row) for row in parse_manifest(manifest_text, geometry).grid]
+    containers = [slot for row in grid for slot in row if slot.description not in ("NAN", "UNUSED")]
+    if containers:
+        heaviest = max(containers, key=lambda slot: slot.weight)
+        if correction == "/3":
+            weight = heaviest.weight // 3
+        else:
+            weight = heaviest.weight + 1 if heaviest.weight < MAX_WEIGHT else heaviest.weight - 1
+        grid[heaviest.row][heaviest.col] = Slot(heaviest.row, heaviest.col, weight, heaviest.description)
+    return format_outbound_manifest(grid)
+
+def warm_start_case(name, manifest_text, geometry, correction, heuristic, pruning, results):
+    #solve the manifest, then its corrected version cold and warm from that plan (see balancer/Repair.py)
+    def solve(text, **options):
+        solver = Problem(text, heuristic=heuristic, pruning=pruning, geometry=geometry, **options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver.run_a_star()
+        return solver
+
+    try:
+        previous = solve(manifest_text)
+        moves = previous.get_moves(previous.final_node) if previous.final_node is not None else []
+        corrected = corrected_manifest(manifest_text, geometry, correction)
+        cold = solve(corrected)
+        warm = solve(corrected, previous_manifest=manifest_text, previous_moves=moves)
+    except Exception as e:
+        results.put({"status": f"error: {e}"})
+        return
+
+    def cost(solver):
+        return None if solver.final_node is None else solver.final_node.g_cost
+
+    results.put({
+        "status": "ok",
+        "cold_expanded": cold.stats.expanded,
+        "warm_expanded": warm.stats.expanded,
+        "cold_cost": cost(cold),
+        "warm_cost": cost(warm),
+        "repaired_cost": None if warm.repaired_plan is None else warm.repaired_plan.g_cost,
+    })
+
+def run_warm_start(cases, heuristics, timeout, pruning="exact"):
+    #a corrected manifest re-solved from its previous plan must never answer with a plan costlier than the cold
+    #solve's or the repaired one's, nor expand more nodes than the cold solve without finding a cheaper plan.
+    #Every case is tried with each of CORRECTIONS. Returns (rows, problems)
+    rows, problems = [], []
+    print(f"{'manifest':<24} {'edit':<5} {'heuristic':<10} {'cold_exp':>10} {'warm_exp':>10} {'cold_cost':>9} {'warm_cost':>9} {'repaired':>9}")
+    for (name, manifest_text, geometry), correction in itertools.product(cases, CORRECTIONS):
+        for heuristic in heuristics:
+            results = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=warm_start_case, args=(name, manifest_text, geometry, correction, heuristic, pruning, results))
+            worker.start()
+            worker.join(timeout)
+
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+                row = {"status": "timeout"}
+            elif results.empty():
+                row = {"status": "error"}
+            else:
+                row = results.get()
+            row["manifest"] = name
+            row["correction"] = correction
+            row["heuristic"] = heuristic
+            rows.append(row)
+
+            if row["status"] != "ok":
+                print(f"{name:<24} {correction:<5} {heuristic:<10} {row['status']}")
+                continue
+
+            def show(value):
+                return "-" if value is None else value
+
+            print(
+                f"{name:<24} {correction:<5} {heuristic:<10} {row['cold_expanded']:>10} {row['warm_expanded']:>10} {show(row['cold_cost']):>9} "
+                f"{show(row['warm_cost']):>9} {show(row['repaired_cost']):>9}"
+            )
+            label = f"{name} {correction} [{heuristic}]"
+            cold_cost, warm_cost = row["cold_cost"], row["warm_cost"]
+            if cold_cost is not None and (warm_cost is None or warm_cost > cold_cost):
+                problems.append(f"{label}: warm plan costs {warm_cost}, the cold one {cold_cost}")
+            cheaper = warm_cost is not None and (cold_cost is None or warm_cost < cold_cost)
+            if row["warm_expanded"] > row["cold_expanded"] and not cheaper:
+                problems.append(f"{label}: warm start expanded {row['warm_expanded']} nodes, cold {row['cold_expanded']}")
+            if row["repaired_cost"] is not None and (row["warm_cost"] is None or row["warm_cost"] > row["repaired_cost"]):
+                problems.append(f"{label}: warm plan costs {row['warm_cost']}, the repaired one {row['repaired_cost']}")
+    return rows, problems
+
+def load_manifests(paths):
+    cases = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            cases.append((os.path.basename(path), f.read(), DEFAULT_GEOMETRY))
+    return cases
+
+def synthetic_manifest(density, seed, max_weight=9999, geometry=DEFAULT_GEOMETRY):
+    #random ship with density * (usable slots) containers, stacked bottom-up in random columns
+    rng = random.Random(seed)
+    rows, cols = geometry.rows, geometry.cols
+    nan_slots = ((0, 0), (0, cols - 1)) #same corners as the real manifests
+    grid = [[Slot(r, c, 0, "UNUSED") for c in range(cols)] for r in range(rows)]
+    for r, c in nan_slots:
+        grid[r][c] = Slot(r, c, 0, "NAN")
+
+    heights = [0] * cols
+    for r, c in nan_slots:
+        heights[c] = max(heights[c], r + 1)
+
+    count = round(density * (rows * cols - len(nan_slots)))
+    for i in range(count):
+        open_cols = [c for c in range(cols) if heights[c] < rows]
+        c = rng.choice(open_cols)
+        r = heights[c]
+        grid[r][c] = Slot(r, c, rng.randint(1, max_weight), f"Synthetic {i+1}")
+        heights[c] += 1
+
+    return format_outbound_manifest(grid)
+
+def synthetic_cases(densities, count, seed, geometries=(DEFAULT_GEOMETRY,)):
+    #names only carry the bay size off the default, so baselines from before --bays still line up
+    cases = []
+    for geometry in geometries:
+        bay = "" if geometry == DEFAULT_GEOMETRY else f"{geometry.rows}x{geometry.cols}_"
+        for density in densities:
+            for i in range(count):
+                case_seed = seed + i
+                manifest_text = synthetic_manifest(density, case_seed, geometry=geometry)
+                cases.append((f"synthetic_{bay}d{density:.2f}_s{case_seed}", manifest_text, geometry))
+    return cases
+
+def print_scaling(rows):
+    #one line per bay size, in run order: how solve time and memory grow with the vessel
+    by_bay = {}
+    for row in rows:
+        by_bay.setdefault(row["bay"], []).append(row)
+
+    print(f"{'bay':<10} {'solves':>6} {'timeouts':>8} {'median_s':>9} {'max_s':>9} {'max_expanded':>12} {'max_rss_kb':>10}")
+    for bay, bay_rows in by_bay.items():
+        solved = [row for row in bay_rows if row["status"] == "ok"]
+        timeouts = sum(1 for row in bay_rows if row["status"] == "timeout")
+        seconds = sorted(row["seconds"] for row in solved)
+        rss = [row["peak_rss_kb"] for row in solved if row["peak_rss_kb"] is not None]
+
+        def show(value, spec):
+            return "-" if value is None else format(value, spec)
+
+        print(
+            f"{bay:<10} {len(solved):>6} {timeouts:>8} {show(seconds[len(seconds) // 2] if seconds else None, '9.3f'):>9} "
+            f"{show(seconds[-1] if seconds else None, '9.3f'):>9} {show(max((row['expanded'] for row in solved), default=None), 'd'):>12} "
+            f"{show(max(rss, default=None), 'd'):>10}"
+        )
+
+def compare(rows, baseline_rows, tolerance):
+    #flag every row that got worse than the baseline by more than tolerance (a fraction, 0.25 = 25%)
+    baseline = {(row["manifest"], row["heuristic"]): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        old = baseline.get((row["manifest"], row["heuristic"]))
+        if old is None or old["status"] != "ok":
+            continue
+        label = f"{row['manifest']} [{row['heuristic']}]"
+        if row["status"] != "ok":
+            regressions.append(f"{label}: was ok, now {row['status']}")
+            continue
+
+        if old.get("cost") is not None and (row["cost"] is None or row["cost"] > old["cost"]):
+            regressions.append(f"{label}: cost {old['cost']} -> {row['cost']}")
+        for field in ("expanded", "generated", "max_open", "peak_rss_kb", "peak_alloc_kb"):
+            if old.get(field) and row.get(field) is not None and row[field] > old[field] * (1 + tolerance):
+                regressions.append(f"{label}: {field} {old[field]} -> {row[field]}")
+        if row["seconds"] > old["seconds"] * (1 + tolerance) and row["seconds"] - old["seconds"] > MIN_SECONDS_DELTA:
+            regressions.append(f"{label}: seconds {old['seconds']:.3f} -> {row['seconds']:.3f}")
+    return regressions
+
+def print_row(row):
+    if row["status"] != "ok":
+        print(f"{row['manifest']:<24} {row['heuristic']:<10} {row['status']}")
+        return
+
+    def show(value):
+        return "-" if value is None else value
+
+    print(
+        f"{row['manifest']:<24} {row['heuristic']:<10} {row['expanded']:>10} {row['generated']:>10} {row['max_open']:>9} "
+        f"{show(row['minutes']):>8} {row['seconds']:>9.3f} {show(row['peak_rss_kb']):>10}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark A* over manifests, and check for regressions against a baseline.")
+    parser.add_argument("manifests", nargs="*", help=f"manifest files (default: every .txt in {MANIFEST_DIR}/)")
+    parser.add_argument("--heuristics", nargs="+", default=sorted(HEURISTICS), choices=sorted(HEURISTICS))
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per solve")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth before flagging, as a fraction")
+    parser.add_argument("--synthetic", nargs="+", type=float, default=[], metavar="DENSITY",
+                        help="also run generated manifests filled to these densities (0-1)")
+    parser.add_argument("--synthetic-count", type=int, default=1, help="generated manifests per density")
+    parser.add_argument("--seed", type=int, default=0, help="first seed for generated manifests")
+    parser.add_argument("--bays", nargs="+", type=parse_geometry, default=[DEFAULT_GEOMETRY], metavar="ROWSxCOLS",
+                        help="bay sizes to generate manifests for (default 8x12); several sizes print a scaling summary")
+    parser.add_argument("--skip-corpus", action="store_true", help=f"only run generated manifests, not {MANIFEST_DIR}/")
+    parser.add_argument("--pruning", default="exact", choices=PRUNING_MODES, help="successor pruning, see balancer/Node.py")
+    parser.add_argument("--vectorized", action="store_true", help="expand nodes with NumPy, see balancer/Vectorized.py")
+    parser.add_argument("--tracemalloc", action="store_true", help="also record peak Python allocations (slows solves down)")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="instead, re-solve weight-corrected copies of every manifest cold and from its previous plan, "
+                             "and fail if the warm plan costs more than the cold or the repaired one, "
+                             "or the warm start expands more nodes without finding a cheaper plan")
+    args = parser.parse_args()
+
+    paths = args.manifests
+    if not paths and not args.skip_corpus:
+        paths = sorted(os.path.join(MANIFEST_DIR, name) for name in os.listdir(MANIFEST_DIR) if name.endswith(".txt"))
+    cases = load_manifests(paths) + synthetic_cases(args.synthetic, args.synthetic_count, args.seed, args.bays)
+
+    if args.warm_start:
+        rows, problems = run_warm_start(cases, args.heuristics, args.timeout, args.pruning)
+        fewer = sum(1 for row in rows if row["status"] == "ok" and row["warm_expanded"] < row["cold_expanded"])
+        print(f"Warm start expanded fewer nodes in {fewer} of {len(rows)} solve(s).")
+        if problems:
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        return
+
+    print(
+        f"{'manifest':<24} {'heuristic':<10} {'expanded':>10} {'generated':>10} {'max_open':>9} "
+        f"{'minutes':>8} {'seconds':>9} {'rss_kb':>10}"
+    )
+    rows = run_benchmark(cases, args.heuristics, args.timeout, args.pruning, args.vectorized, args.tracemalloc)
+    if len(args.bays) > 1:
+        print()
+        print_scaling(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "timeout": args.timeout, "results": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_rows = json.load(f)["results"]
+        regressions = compare(rows, baseline_rows, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+if __name__ == "__main__":
+    main()
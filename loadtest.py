@@ -0,0 +1,212 @@
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.cookiejar import CookieJar
+
+MANIFEST_DIR = "manifests"
+STARTUP_TIMEOUT = 30.0 #seconds to wait for a locally started server to answer
+REQUEST_TIMEOUT = 300.0 #a solve on / can legitimately take a while
+
+class LoadClient:
+    # LOAD CLIENT CLASS
+    # -------------
+    # One simulated operator: its own cookie jar (so its own operator session on the server), solving sample
+    # manifests on / and adding comments on /add_comment until the run is over.
+    # Functionality:
+    #   Each request picks /add_comment with probability comment_ratio, else solves a random manifest on /
+    #   Comments pass the log cursor of the previous answer, like the page does, so only new entries come back
+    #   samples collects (endpoint, seconds, ok) for every request; a non-200 answer or a network error is not ok
+
+    def __init__(self, number, base_url, manifests, form, comment_ratio, seed):
+        self.number = number
+        self.base_url = base_url.rstrip("/")
+        self.manifests = manifests
+        self.form = form
+        self.comment_ratio = comment_ratio
+        self.random = random.Random(seed)
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        self.log_cursor = 0
+        self.sent = 0
+        self.samples = []
+
+    def request(self, path, data, content_type):
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, headers={"Content-Type": content_type})
+        with self.opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+            return response.status, response.read()
+
+    def solve(self):
+        form = dict(self.form, filename=self.random.choice(self.manifests))
+        status, _ = self.request("/", urllib.parse.urlencode(form).encode("utf-8"), "application/x-www-form-urlencoded")
+        return status
+
+    def comment(self):
+        data = json.dumps({"content": f"Load test comment {self.number}-{self.sent}", "since": self.log_cursor}).encode("utf-8")
+        status, body = self.request("/add_comment", data, "application/json")
+        if status == 200:
+            self.log_cursor = json.loads(body).get("log_cursor", self.log_cursor)
+        return status
+
+    def run(self, deadline, take_request):
+        while time.time() < deadline and take_request():
+            endpoint = "/add_comment" if self.random.random() < self.comment_ratio else "/"
+            start_time = time.perf_counter()
+            try:
+                ok = (self.comment() if endpoint == "/add_comment" else self.solve()) == 200
+            except (urllib.error.URLError, OSError, ValueError):
+                ok = False
+            self.samples.append((endpoint, time.perf_counter() - start_time, ok))
+            self.sent += 1
+
+def percentile(sorted_values, fraction):
+    #nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(samples, seconds):
+    #per endpoint and overall: request and error counts, p50/p99/max latency in ms and requests per second
+    groups = {}
+    for endpoint, latency, ok in samples:
+        groups.setdefault(endpoint, []).append((latency, ok))
+    groups["all"] = [(latency, ok) for _, latency, ok in samples]
+
+    rows = []
+    for endpoint in sorted(groups, key=lambda name: (name == "all", name)):
+        latencies = sorted(latency for latency, _ in groups[endpoint])
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(latencies),
+            "errors": sum(1 for _, ok in groups[endpoint] if not ok),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+            "throughput": round(len(latencies) / seconds, 2) if seconds > 0 else None,
+        })
+    return rows
+
+def print_summary(rows):
+    def show(value):
+        return "-" if value is None else value
+
+    print(f"{'endpoint':<14} {'requests':>9} {'errors':>7} {'p50_ms':>9} {'p99_ms':>9} {'max_ms':>9} {'req/s':>8}")
+    for row in rows:
+        print(
+            f"{row['endpoint']:<14} {row['requests']:>9} {row['errors']:>7} {show(row['p50_ms']):>9} "
+            f"{show(row['p99_ms']):>9} {show(row['max_ms']):>9} {show(row['throughput']):>8}"
+        )
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(threads):
+    #app.py on a free local port, logging and writing outbound manifests into a scratch home directory
+    #instead of the desktop, with solution cache and checkpoints in memory only. Returns (process, url)
+    port = free_port()
+    scratch = tempfile.mkdtemp(prefix="balancer_loadtest_")
+    env = dict(os.environ, HOME=scratch, USERPROFILE=scratch, BALANCER_HOST="127.0.0.1", BALANCER_PORT=str(port),
+               BALANCER_THREADS=str(threads), BALANCER_CACHE_DIR="", BALANCER_CHECKPOINT_DIR="")
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    process = subprocess.Popen([sys.executable, app_path], cwd=os.path.dirname(app_path), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {process.returncode} before serving")
+        try:
+            with urllib.request.urlopen(f"{url}/log", timeout=1.0):
+                return process, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"app.py did not answer on {url} within {STARTUP_TIMEOUT:.0f}s")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def run_load(url, manifests, clients, duration, max_requests, form, comment_ratio, seed):
+    #every client on its own thread until the duration is over or max_requests were sent in total.
+    #Returns (samples, seconds the run took)
+    lock = threading.Lock()
+    remaining = [max_requests]
+
+    def take_request():
+        if max_requests is None:
+            return True
+        with lock:
+            remaining[0] -= 1
+            return remaining[0] >= 0
+
+    load_clients = [LoadClient(n, url, manifests, form, comment_ratio, seed + n) for n in range(clients)]
+    start_time = time.time()
+    deadline = start_time + duration
+    threads = [threading.Thread(target=client.run, args=(deadline, take_request), daemon=True) for client in load_clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.time() - start_time
+    return [sample for client in load_clients for sample in client.samples], seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the operator app: many concurrent operators solving sample manifests and adding comments.")
+    parser.add_argument("manifests", nargs="*", help=f"manifest filenames in {MANIFEST_DIR}/ to solve (default: all of them)")
+    parser.add_argument("--url", help="server to test, e.g. http://port-office:5000 (default: start app.py locally)")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent operators")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep sending requests")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests in total")
+    parser.add_argument("--comment-ratio", type=float, default=0.5, help="fraction of requests that go to /add_comment")
+    parser.add_argument("--strategy", default="astar", help="search strategy picked on the form")
+    parser.add_argument("--time-limit", type=float, default=5, help="time budget per solve sent with the form, in seconds")
+    parser.add_argument("--threads", type=int, default=16, help="request threads of a locally started server (waitress only)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the clients' request mix")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.clients < 1 or args.duration <= 0 or not 0 <= args.comment_ratio <= 1:
+        parser.error("--clients must be at least 1, --duration positive and --comment-ratio between 0 and 1")
+    manifests = args.manifests or sorted(name for name in os.listdir(MANIFEST_DIR) if name.endswith(".txt"))
+    form = {"strategy": args.strategy, "time_limit": args.time_limit}
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.threads)
+    try:
+        print(f"{args.clients} clients against {url} for up to {args.duration:g}s, {len(manifests)} manifest(s)")
+        samples, seconds = run_load(url, manifests, args.clients, args.duration, args.requests, form, args.comment_ratio, args.seed)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    rows = summarize(samples, seconds)
+    print_summary(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "url": url, "clients": args.clients,
+                       "seconds": round(seconds, 3), "manifests": manifests, "form": form, "results": rows}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()